@@ -1,7 +1,7 @@
 from diffractsim_main import diffractsim
 diffractsim.set_backend("CPU") #Change the string to "CUDA" to use GPU acceleration
 
-from diffractsim_main.diffractsim import MonochromaticField, ApertureFromImage, Lens, mm, um, nm, cm, FourierPhaseRetrieval, PSF_convolution, apply_transfer_function, bd
+from diffractsim_main.diffractsim import MonochromaticField, ApertureFromImage, Lens, mm, um, nm, cm, FourierPhaseRetrieval, bd
 
 
 # Generate a Fourier plane phase hologram, comment out if you already have a hologram
@@ -11,8 +11,11 @@ PR.save_retrieved_phase_as_image('rings_phase_hologram.png')
 
 
 #Add a plane wave
+# deferred mode: the operations are recorded and only computed when the field is read. get_colors at z = 0 evaluates the hologram,
+# and the final get_colors applies the lens and then the PSF convolution and the propagation, whose transfer functions are
+# multiplied so both share a single FFT pair
 F = MonochromaticField(
-    wavelength=532.8 * nm, extent_x=30 * mm, extent_y=30 * mm, Nx=2400, Ny=2400, intensity = 0.005
+    wavelength=532.8 * nm, extent_x=30 * mm, extent_y=30 * mm, Nx=2400, Ny=2400, intensity = 0.005, deferred = True
 )
 
 
@@ -23,7 +26,7 @@ F.add(ApertureFromImage(
 
 
 
-plot colors at z = 0
+# plot colors at z = 0
 rgb = F.get_colors()
 F.plot_colors(rgb)
 
@@ -73,7 +76,7 @@ print(f"PSF center value: {PSF[PSF.shape[0]//2, PSF.shape[1]//2]}")
 print(f"PSF effective width (FWHM estimate): {bd.sum(PSF > bd.max(PSF)/2) * F.dx / mm:.2f} mm")
 
 # Convolve the current complex field with the PSF (coherent convolution)
-F.E = PSF_convolution(F, F.E, F.λ, PSF, scale_factor = 1)
+F.apply_PSF(PSF)
 
 
 
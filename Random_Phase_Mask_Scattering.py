@@ -77,14 +77,16 @@ class PhaseMaskScattering:
         """Generate the specified number of random phase masks."""
         print(f"Generating {self.num_masks} phase masks with scattering strength {self.scattering_strength}")
         
+        self.phase_masks = []
+        self.phase_screens = []
         for i in range(self.num_masks):
-            # Create phase mask function
-            def phase_function(xx, yy, strength=self.scattering_strength):
-                return self._generate_random_phase_pattern(xx, yy, strength)
+            # The phase pattern is generated once and stored, so the same mask is visualized and applied
+            phase = self._generate_random_phase_pattern(self.simulation.xx, self.simulation.yy, self.scattering_strength)
+            self.phase_screens.append(phase)
             
             # Create SLM (phase mask) for this scattering layer
             mask = SLM(
-                phase_mask_function=lambda xx, yy: phase_function(xx, yy),
+                phase_mask_function=lambda xx, yy, phase=phase: phase,
                 size_x=self.mask_size,
                 size_y=self.mask_size,
                 simulation=self.simulation
@@ -92,6 +94,9 @@ class PhaseMaskScattering:
             
             self.phase_masks.append(mask)
         
+        # square aperture of the masks, shared by all the layers
+        self.aperture = (bd.abs(self.simulation.xx) < self.mask_size/2) & (bd.abs(self.simulation.yy) < self.mask_size/2)
+        
         print(f"Created {len(self.phase_masks)} phase masks")
     
     def apply_scattering(self):
@@ -101,17 +106,11 @@ class PhaseMaskScattering:
         """
         print(f"Applying scattering through {len(self.phase_masks)} phase masks")
         
-        # Apply each phase mask sequentially
-        for i, mask in enumerate(self.phase_masks):
-            # Add the phase mask to the simulation
-            self.simulation.add(mask)
-            
-            # Propagate a small distance to simulate scattering layer thickness
-            # Each scattering layer is separated by a small distance
-            
-            self.simulation.propagate(self.layer_thickness)
-            
-            print(f"Applied phase mask {i+1}/{len(self.phase_masks)}")
+        # Apply all the phase masks with the split-step propagator: each mask is followed by the propagation
+        # of the layer thickness, reusing the same cached transfer function for all the layers
+        self.simulation.propagate_layers(self.phase_screens, self.layer_thickness, aperture=self.aperture)
+        
+        print(f"Applied {len(self.phase_masks)} phase masks")
     
     def get_total_scattering_distance(self):
         """
@@ -0,0 +1,53 @@
+import sys
+import time
+import diffractsim
+import diffractsim.util.chirp_z_transform as czt
+from diffractsim import MonochromaticField, CircularAperture, mm, cm, nm, next_fast_len
+
+"""
+Benchmark of the Bluestein propagation (MonochromaticField.zoom_propagate) with the chirp-z transform padded to 
+the next power of two (previous behaviour) and to the next fast FFT length of the current backend.
+
+Usage:
+python benchmark_chirpz_padding.py [N1 N2 ...]
+"""
+
+grid_sizes = [int(N) for N in sys.argv[1:]] or [1000, 1200, 1500, 2000, 2048, 2400, 3000]
+repetitions = 3
+
+
+def next_power_of_two(n):
+    return 1 << (n - 1).bit_length()
+
+
+def zoom_propagate_time(N):
+    F = MonochromaticField(wavelength=532 * nm, extent_x=20 * mm, extent_y=20 * mm, Nx=N, Ny=N)
+    F.add(CircularAperture(radius = 2 * mm))
+    E0 = F.E
+
+    # warm up: cache the chirp-z kernels
+    F.zoom_propagate(50 * cm, x_interval = [-2 * mm, 2 * mm], y_interval = [-2 * mm, 2 * mm])
+
+    times = []
+    for i in range(repetitions):
+        F = MonochromaticField(wavelength=532 * nm, extent_x=20 * mm, extent_y=20 * mm, Nx=N, Ny=N)
+        F.E = E0
+        t0 = time.perf_counter()
+        F.zoom_propagate(50 * cm, x_interval = [-2 * mm, 2 * mm], y_interval = [-2 * mm, 2 * mm])
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+print(f"{'N':>6} {'pow2 L':>8} {'pow2 [s]':>9} {'fast L':>8} {'fast [s]':>9} {'speedup':>8}")
+
+for N in grid_sizes:
+    results = []
+    for padding in [next_power_of_two, next_fast_len]:
+        czt.next_fast_len = padding
+        diffractsim.clear_kernel_cache()
+        results.append((padding(2 * N - 1), zoom_propagate_time(N)))
+
+    (L_pow2, t_pow2), (L_fast, t_fast) = results
+    print(f"{N:6d} {L_pow2:8d} {t_pow2:9.3f} {L_fast:8d} {t_fast:9.3f} {t_pow2/t_fast:7.2f}x")
+
+czt.next_fast_len = next_fast_len
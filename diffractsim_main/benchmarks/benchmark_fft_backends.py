@@ -0,0 +1,50 @@
+import sys
+import time
+import numpy as np
+import diffractsim
+from diffractsim import MonochromaticField, CircularAperture, mm, cm, nm
+
+"""
+Benchmark of the angular spectrum propagation (MonochromaticField.propagate) with the different CPU FFT backends.
+
+The transfer function is cached after the first propagation, so the measured time is dominated by the FFT pair.
+
+Usage:
+python benchmark_fft_backends.py [N1 N2 ...]
+"""
+
+grid_sizes = [int(N) for N in sys.argv[1:]] or [2048, 2400, 4096]
+repetitions = 5
+
+backends = [("CPU", {}), ("CPU-MT", {})]
+if diffractsim.util.backend_functions.PYFFTW_AVAILABLE:
+    backends += [("FFTW", {'wisdom_file': 'fftw_wisdom.pickle'})]
+
+
+for N in grid_sizes:
+    print(f"\nGrid size: {N} x {N}")
+    reference_time = None
+
+    for name, kwargs in backends:
+        diffractsim.set_backend(name, **kwargs)
+
+        F = MonochromaticField(wavelength=532 * nm, extent_x=20 * mm, extent_y=20 * mm, Nx=N, Ny=N)
+        F.add(CircularAperture(radius = 2 * mm))
+        E0 = F.E
+
+        # warm up: create the FFT plans and cache the transfer function
+        t0 = time.perf_counter()
+        F.propagate(50 * cm)
+        first_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for i in range(repetitions):
+            F.E = E0
+            F.propagate(50 * cm)
+        elapsed = (time.perf_counter() - t0) / repetitions
+
+        if reference_time is None:
+            reference_time = elapsed
+        print(f"{name:>8}: first call {first_time:.3f} s, next calls {elapsed:.3f} s per propagation ({reference_time/elapsed:.2f}x)")
+
+diffractsim.set_backend("CPU")
@@ -0,0 +1,83 @@
+import sys
+import time
+import numpy as np
+import diffractsim
+from diffractsim import MonochromaticField, PolychromaticField, CircularAperture, RectangularSlit, Lens, PSF_convolution, cf, mm, cm, nm, um
+
+"""
+Benchmark and accuracy report of the single precision (complex64) simulation mode against the double precision (complex128) path.
+
+For each test case, the relative L2 errors of the intensity and of the complex field, and the maximum phase error (over the samples
+with an amplitude above 1% of the maximum) are reported, together with the maximum sRGB difference of the polychromatic render.
+The intensity error alone doesn't detect phase errors, which appear only after further propagations.
+
+Usage:
+python benchmark_single_precision.py [N]
+"""
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+
+
+def fog_hologram_setup(dtype):
+    F = MonochromaticField(wavelength=532.8 * nm, extent_x=30 * mm, extent_y=30 * mm, Nx=N, Ny=N, intensity = 0.005, dtype = dtype)
+    F.add(RectangularSlit(width = 10 * mm, height = 10 * mm))
+    F.add(Lens(f = 200 * cm))
+    return F
+
+
+def propagate(F):
+    F.propagate(200 * cm)
+
+def scale_propagate(F):
+    F.scale_propagate(200 * cm, scale_factor = 0.5)
+
+def zoom_propagate(F):
+    F.zoom_propagate(200 * cm, x_interval = [-2 * mm, 2 * mm], y_interval = [-2 * mm, 2 * mm])
+
+def lens_focal_plane(F):
+    F.propagate_to_lens_focal_plane(100 * cm, x_interval = [-2 * mm, 2 * mm], y_interval = [-2 * mm, 2 * mm])
+    F.propagate(5 * cm)
+
+def psf_convolution(F):
+    PSF = np.exp(-(F.xx**2 + F.yy**2) / (300 * um)**2)
+    PSF = PSF / (np.sum(PSF) * F.dx * F.dy)
+    F.E = PSF_convolution(F, F.E, F.λ, PSF)
+    F.propagate(200 * cm)
+
+
+print(f"Grid size: {N} x {N}\n")
+print(f"{'case':>16} {'float64 [s]':>12} {'float32 [s]':>12} {'speedup':>8} {'field size [MB]':>16} {'intensity error':>16} {'field error':>12} {'phase error [rad]':>18}")
+
+for case in [propagate, scale_propagate, zoom_propagate, lens_focal_plane, psf_convolution]:
+    results = {}
+    for dtype in [np.complex128, np.complex64]:
+        F = fog_hologram_setup(dtype)
+        case(F) # warm up the transfer function cache
+
+        F = fog_hologram_setup(dtype)
+        t0 = time.perf_counter()
+        case(F)
+        results[dtype] = (time.perf_counter() - t0, F.get_intensity(), F.E, F.E.nbytes / 1e6)
+
+    t64, I64, E64, size64 = results[np.complex128]
+    t32, I32, E32, size32 = results[np.complex64]
+    error = np.linalg.norm(I32 - I64) / np.linalg.norm(I64)
+    field_error = np.linalg.norm(E32 - E64) / np.linalg.norm(E64)
+    significant = np.abs(E64) > 0.01 * np.max(np.abs(E64))
+    phase_error = np.max(np.abs(np.angle(E32[significant] * np.conjugate(E64[significant]))))
+    print(f"{case.__name__:>16} {t64:12.3f} {t32:12.3f} {t64/t32:7.2f}x {size64:7.0f} -> {size32:5.0f} {error:16.2e} {field_error:12.2e} {phase_error:18.2e}")
+
+
+# polychromatic render
+rgb = {}
+times = {}
+for dtype in [np.complex128, np.complex64]:
+    F = PolychromaticField(spectrum = 2 * cf.illuminant_d65, extent_x = 3 * mm, extent_y = 3 * mm, Nx = N//4, Ny = N//4, dtype = dtype)
+    F.add(CircularAperture(radius = 0.2 * mm))
+    F.propagate(z = 20 * cm)
+    t0 = time.perf_counter()
+    rgb[dtype] = F.get_colors()
+    times[dtype] = time.perf_counter() - t0
+
+print(f"\nPolychromatic render ({N//4} x {N//4}): float64 {times[np.complex128]:.3f} s, float32 {times[np.complex64]:.3f} s, "
+      f"max sRGB difference {np.max(np.abs(rgb[np.complex64] - rgb[np.complex128])):.2e}")
@@ -1,16 +1,21 @@
-from .util.backend_functions import get_backend, set_backend
+from .util.backend_functions import get_backend, set_backend, set_spectrum_layout, fft_workers
+from .util.fft_layout import spectrum_fftfreq
+from .util.fft_backends import next_fast_len
 from .util.backend_functions import backend as bd
 from .util.backend_functions import backend as bd
+from .util.kernel_cache import set_kernel_cache_size, get_kernel_cache_info, clear_kernel_cache
 from .util.image_handling import load_image_as_function
 from .util.file_handling import load_file_as_function, load_phase_as_function
 from .polychromatic_simulator import PolychromaticField
 from .monochromatic_simulator import MonochromaticField
+from .separable_simulator import SeparableField
+from .radial_simulator import RadialField
 from . import colour_functions as cf
 from .polynomials import zernike_polynomial
 from .holography import FourierPhaseRetrieval, CustomPhaseRetrieval, RotationalPhaseDesign
 from .diffractive_elements import *
 from .light_sources import *
 
-from.propagation_methods import PSF_convolution, apply_transfer_function
+from.propagation_methods import PSF_convolution, ConvolutionKernel, apply_transfer_function
 
 from .util.constants import *
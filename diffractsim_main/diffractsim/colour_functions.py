@@ -1,4 +1,5 @@
 import numpy as np
+import heapq
 from pathlib import Path
 from scipy.interpolate import CubicSpline
 from .util.backend_functions import backend as bd
@@ -16,6 +17,7 @@ class ColourSystem:
     def __init__(self, spectrum_size = 400, spec_divisions = 40, clip_method = 1):
         global bd
         from .util.backend_functions import backend as bd
+        from .util.backend_functions import backend_name
 
         self.spectrum_size = spectrum_size
         # import CIE XYZ standard observer color matching functions
@@ -38,8 +40,8 @@ class ColourSystem:
             self.cie_y = np.interp(self.λ_list, λ_list_old, cmf.T[1])
             self.cie_z = np.interp(self.λ_list, λ_list_old, cmf.T[2])
 
-        # if cupy backend:
-        if bd != np:
+        # if cupy or jax backend:
+        if backend_name != 'numpy':
             self.cie_x = bd.array(self.cie_x)
             self.cie_y = bd.array(self.cie_y)
             self.cie_z = bd.array(self.cie_z)
@@ -191,6 +193,108 @@ class ColourSystem:
 
 
 
+    def spec_partition_weights(self, spec):
+        """
+        Compute the XYZ color of each of the spec_divisions partitions of the spectrum spec, returning a (spec_divisions, 3) table.
+        The XYZ colors of a pattern with intensity I illuminated by the i-th partition of the spectrum are then 
+        intensity_to_XYZ(I, weights[i]), without building the product of the intensity and the spectral samples of the partition.
+
+        spec: spectral intensity sampled on 380-780 nm interval with spectrum_size samples
+        """
+
+        return bd.stack([self.spec_partition_to_XYZ(spec_partition, i) for i, spec_partition in enumerate(bd.split(spec, self.spec_divisions))])
+
+
+    def adaptive_spec_samples(self, spec, tolerance = 1e-2, max_path_difference = 2000, max_samples = None):
+        """
+        Choose the wavelengths and the XYZ weights of a quadrature of the spectrum spec, concentrating the wavelengths where 
+        the product of the spectrum and the color matching functions is large, instead of sampling the 380-780 nm interval uniformly.
+
+        The intensity of each point of the simulated pattern is interpolated linearly between the chosen wavelengths, so the XYZ weight 
+        of each wavelength is the integral of the spectrum times the color matching functions times its interpolation hat function. 
+        Starting from the interval where the spectrum is nonzero, the interval with the largest error bound is bisected until the 
+        estimated relative XYZ error is below tolerance. The error bound assumes intensities varying like the interference fringes 
+        of an optical path difference equal to max_path_difference, I(λ) = cos²(π max_path_difference / λ).
+
+        Parameters
+        ----------
+        spec: spectral intensity sampled on 380-780 nm interval with spectrum_size samples
+        tolerance: target relative error of the XYZ colors
+        max_path_difference: largest optical path difference (in nm) whose interference colors must be resolved.
+                             Larger values require more wavelengths.
+        max_samples: maximum number of wavelengths. By default, it's only limited by the sampling of the spectrum
+
+        Returns
+        -------
+        λ: chosen wavelengths in nm
+        weights: (len(λ), 3) table with the XYZ weights of each wavelength (see intensity_to_XYZ)
+        error: estimated relative error of the XYZ colors
+        """
+
+        spec = np.asarray(spec.get() if hasattr(spec, 'get') else spec, dtype = np.float64)
+        cie_xyz = np.asarray(self.cie_xyz.get() if hasattr(self.cie_xyz, 'get') else self.cie_xyz, dtype = np.float64)
+        λ = self.λ_list
+
+        P = spec[None, :] * cie_xyz * self.Δλ * 0.003975 * 683.002
+        mass = np.sum(np.abs(P), axis = 0)
+        total = np.sum(mass)
+        if total == 0:
+            raise ValueError("the spectrum has no visible component")
+
+        # bound of the second derivative of the intensity of the fringes
+        curvature = 0.5 * (2 * np.pi * max_path_difference / λ**2)**2
+
+        def error_bound(i, j):
+            s = slice(i, j + 1)
+            return 0.5 * np.sum(curvature[s] * mass[s] * (λ[s] - λ[i]) * (λ[j] - λ[s])) / total
+
+        nonzero = np.nonzero(mass)[0]
+        start, end = nonzero[0], nonzero[-1]
+        if max_samples is None:
+            max_samples = end - start + 1
+
+        # intervals sorted by decreasing error bound
+        intervals = [(-error_bound(start, end), start, end)]
+        error = -intervals[0][0]
+        nodes = {start, end}
+
+        while error > tolerance and len(nodes) < max_samples and len(intervals) > 0:
+            e, i, j = heapq.heappop(intervals)
+            if j - i < 2:
+                # the interval can't be bisected with the sampling of the spectrum, so its error remains
+                continue
+
+            m = (i + j)//2
+            nodes.add(m)
+            error += e
+            for a, b in ((i, m), (m, j)):
+                e_ab = error_bound(a, b)
+                error += e_ab
+                heapq.heappush(intervals, (-e_ab, a, b))
+
+        nodes = sorted(nodes)
+        weights = np.zeros((len(nodes), 3))
+        if len(nodes) == 1:
+            weights[0] = np.sum(P, axis = 1)
+        for k in range(len(nodes) - 1):
+            s = slice(nodes[k], nodes[k + 1] + 1 if k == len(nodes) - 2 else nodes[k + 1])
+            t = (λ[s] - λ[nodes[k]]) / (λ[nodes[k + 1]] - λ[nodes[k]])
+            weights[k] += np.sum(P[:, s] * (1 - t), axis = 1)
+            weights[k + 1] += np.sum(P[:, s] * t, axis = 1)
+
+        return λ[nodes], bd.array(weights), max(error, 0.)
+
+
+    def intensity_to_XYZ(self, I, weights):
+        """
+        Convert the intensity distribution I illuminated by a spectrum partition to XYZ colors, 
+        scaling it by the XYZ weights of the partition (see spec_partition_weights).
+        The result has the form used by XYZ_to_sRGB_linear, with a column for each point of I.
+        """
+
+        return weights[:, None] * bd.reshape(I, (1, -1))
+
+
     def spec_to_sRGB(self, spec):
         """
         Convert a spectrum to an RGB color.
@@ -16,12 +16,15 @@ All rights reserved.
 
 
 class SLM(DOE):
+    wavelength_invariant = True
+
     def __init__(self, phase_mask_function, size_x, size_y, simulation = None):
 
         """
         Class representing a spatial light modulator (SLM)
         Imparts a given phase profile specified as a function by phase_mask_function agument
         The SLM is centered on the plane and its physical size is specified in image_size parameter as size_x: float and size_y: float
+        phase_mask_function is called with the full 2D coordinate grids xx and yy, and must return the phase sampled on them.
         """
 
         
@@ -37,6 +40,9 @@ class SLM(DOE):
 
         
     def get_transmittance(self, xx, yy, λ):
+        # the simulation passes broadcastable (1, Nx) and (Ny, 1) coordinates: phase_mask_function gets the full grids
+        shape = np.broadcast_shapes(xx.shape, yy.shape)
+        xx, yy = bd.broadcast_to(xx, shape), bd.broadcast_to(yy, shape)
         if backend_name == 'cupy':
             return bd.where((bd.abs(xx) < self.size_x/2)   &  (bd.abs(yy) < self.size_y/2),   bd.exp(1j *  bd.array(self.phase_mask_function(xx.get(),yy.get()))), bd.zeros(xx.shape))
         else:
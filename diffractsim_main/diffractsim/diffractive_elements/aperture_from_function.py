@@ -3,16 +3,22 @@ from ..util.backend_functions import backend as bd
 from .diffractive_element import DOE
 
 class ApertureFromFunction(DOE):
-    def __init__(self, function):
+    def __init__(self, function, wavelength_invariant = False):
         """
         Evaluate a function with arguments 'x : 2D  array' , 'y : 2D array' and 'λ : float' as the amplitude transmittance of the aperture. 
+        x and y are full 2D coordinate grids (read-only broadcast views of the 1D coordinates of the simulation), so the function can index them 
+        as arrays of the shape of the field.
+        If the function doesn't depend on λ, set wavelength_invariant = True, so polychromatic simulations evaluate it only once (with λ = None).
         """
         global bd
         from ..util.backend_functions import backend as bd
 
         self.function = function
+        self.wavelength_invariant = wavelength_invariant
 
     def get_transmittance(self, xx, yy, λ):
 
-        t = self.function(xx, yy, λ)
+        # the simulation passes broadcastable (1, Nx) and (Ny, 1) coordinates: the function gets the full grids
+        shape = np.broadcast_shapes(xx.shape, yy.shape)
+        t = self.function(bd.broadcast_to(xx, shape), bd.broadcast_to(yy, shape), λ)
         return t
@@ -16,6 +16,8 @@ All rights reserved.
 
 
 class ApertureFromImage(DOE):
+    wavelength_invariant = True
+
     def __init__(self, amplitude_mask_path= None, phase_mask_path= None, image_size = None, phase_mask_format = 'hsv', amplitude_mask_extent = [0,1], simulation = None):
 
         """
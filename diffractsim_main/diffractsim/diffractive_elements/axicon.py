@@ -3,6 +3,8 @@ from ..util.backend_functions import backend as bd
 from .diffractive_element import DOE
 
 class Axicon(DOE):
+    wavelength_invariant = True
+
     def __init__(self, period, radius = None, aberration = None):
         """
         Axicon that creates a beam with an approximate Bessel function profile
@@ -25,3 +27,7 @@ class Axicon(DOE):
         phase_shift = -2*bd.pi*r/self.period
         t = t*bd.exp(1j*phase_shift)
         return t
+
+    def get_radial_transmittance(self, r, λ):
+
+        return self.get_transmittance(r, bd.zeros_like(r), λ)
@@ -4,6 +4,8 @@ import numpy as np
 from .diffractive_element import DOE
 
 class CircularAperture(DOE):
+    wavelength_invariant = True
+
     def __init__(self, radius , x0 = 0, y0 = 0):
         """
         Creates a circular slit centered at the point (x0,y0)
@@ -23,6 +25,14 @@ class CircularAperture(DOE):
 
         return t
 
+    def get_radial_transmittance(self, r, λ):
+
+        # the aperture is rotationally symmetric only when it's centered
+        if self.x0 != 0 or self.y0 != 0:
+            return None
+
+        return self.get_transmittance(r, bd.zeros_like(r), λ)
+
     def get_coherent_PSF(self,  xx, yy, z, λ):
         """ 
         Get the coherent point spread function (PSF) of the DEO when it acts as the pupil of an imaging system
@@ -31,10 +41,11 @@ class CircularAperture(DOE):
         PSF(x,y) = 1 / (z*λ)**2 * ∫∫  t(u, v) * exp(-1j*pi/ (z*λ) *(u*x + v*y)) * du*dv
         """
 
-        if bd == np:
-            from scipy import special
-        else: 
+        from ..util.backend_functions import backend_name
+        if backend_name == 'cupy':
             from cupyx.scipy import special
+        else: 
+            from scipy import special
 
 
         rr = bd.sqrt(xx**2 + yy**2)
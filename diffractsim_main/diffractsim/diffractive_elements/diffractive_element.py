@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 from ..util.scaled_FT import scaled_fourier_transform
+from ..util.fft_layout import forward_spectrum, inverse_spectrum
+from ..util.precision import match_precision
 
 """
 
@@ -11,20 +13,66 @@ All rights reserved.
 """
 
 class DOE(ABC):
+    # DOEs whose transmittance doesn't depend on the wavelength set it to True, 
+    # so PolychromaticField evaluates them only once for all the wavelengths (see get_invariant_transmittance)
+    wavelength_invariant = False
+    # DOEs whose wavelength dependent transmittance (and get_E) can be evaluated with a broadcast (Nλ, 1, 1) array of wavelengths 
+    # set it to True, so PolychromaticField evaluates them once for each chunk of wavelengths
+    supports_wavelength_batch = False
+
     @abstractmethod
     def __init__(self):
         pass
 
     @abstractmethod
     def get_transmittance(self, xx, yy, λ):
+        """
+        Return the transmittance evaluated at the coordinates xx, yy. The simulations pass the broadcastable (1, Nx) and (Ny, 1) 
+        coordinates x[None, :] and y[:, None], so the transmittance must be computed with operations that broadcast them.
+        """
         pass
 
     def __add__(self, DOE2):
         return DOE_mix(self, DOE2)
 
+    def get_separable_transmittance(self, x, y, λ):
+        """
+        Return the 1D factors (t_x, t_y) of the transmittance t(x,y) = t_x(x) * t_y(y) evaluated at the 1D coordinates x and y,
+        or None if the transmittance isn't separable. It's used by SeparableField to avoid evaluating the transmittance over the 2D grid.
+        """
+        return None
+
+    def get_radial_transmittance(self, r, λ):
+        """
+        Return the transmittance of a rotationally symmetric DOE evaluated at the radii r, 
+        or None if the transmittance isn't rotationally symmetric. It's used by RadialField.
+        """
+        return None
+
+    def get_invariant_transmittance(self, xx, yy):
+        """
+        Return the factor t_0(x,y) of the transmittance t(x,y,λ) = t_0(x,y) * t_λ(x,y,λ) which doesn't depend on the wavelength, 
+        or None if the transmittance isn't split. The remaining factor t_λ is returned by get_wavelength_dependent_transmittance.
+        For wavelength invariant DOEs, t_0 is the whole transmittance.
+        It's used by PolychromaticField to evaluate t_0 once for all the wavelengths.
+        """
+        if self.wavelength_invariant:
+            return self.get_transmittance(xx, yy, None)
+        return None
+
+    def get_wavelength_dependent_transmittance(self, xx, yy, λ):
+        """
+        Return the factor t_λ(x,y,λ) of the transmittance which depends on the wavelength (see get_invariant_transmittance),
+        or None for wavelength invariant DOEs.
+        """
+        if self.wavelength_invariant:
+            return None
+        return self.get_transmittance(xx, yy, λ)
+
     def get_E(self, E, xx, yy, λ):
         # by default the behavior of all DOE is linear in amplitude
-        return E*self.get_transmittance(xx, yy, λ)
+        # the transmittance is casted to the precision of the field (complex64 for single precision simulations)
+        return E*match_precision(self.get_transmittance(xx, yy, λ), E)
 
     def get_coherent_PSF(self,  xx, yy, z, λ):
         """ 
@@ -55,15 +103,16 @@ class DOE(ABC):
         return self.get_transmittance(-fxx*λ*z, -fyy*λ*z, λ)
 
 
-    def get_optical_transfer_function(self,  fxx, fyy, z, λ):
+    def get_optical_transfer_function(self,  fxx, fyy, z, λ, layout = 'centered'):
         """ 
         Get the (incoherent) optical transfer function (OTF) of the DOE when it acts as the pupil of an imaging system
+        By default, fxx and fyy are sampled in centered coordinates (fftshift order). Use layout = 'native' for frequencies in unshifted FFT order.
         """
         global bd
         from ..util.backend_functions import backend as bd
 
-        h = bd.fft.ifft2(bd.fft.ifftshift(self.get_amplitude_transfer_function(fxx, fyy, z, λ)))
-        H = bd.fft.fftshift(bd.fft.fft2(h*bd.conjugate(h))) 
+        h = inverse_spectrum(self.get_amplitude_transfer_function(fxx, fyy, z, λ), layout)
+        H = forward_spectrum(h*bd.conjugate(h), layout)
 
         dfx = fxx[0,1]-fxx[0,0]
         dfy = fyy[1,0]-fyy[0,0]
@@ -81,6 +130,14 @@ class DOE_mix(DOE):
         self.DOE1 = DOE1
         self.DOE2 = DOE2
 
+    @property
+    def wavelength_invariant(self):
+        return self.DOE1.wavelength_invariant and self.DOE2.wavelength_invariant
+
+    @property
+    def supports_wavelength_batch(self):
+        return self.DOE1.supports_wavelength_batch and self.DOE2.supports_wavelength_batch
+
     def get_transmittance(self, xx, yy, λ):
         return self.DOE1.get_transmittance(xx, yy, λ) + self.DOE2.get_transmittance(xx, yy, λ)
 
@@ -3,6 +3,8 @@ from ..util.backend_functions import backend as bd
 from .diffractive_element import DOE
 
 class BinaryFZP(DOE):
+    wavelength_invariant = True
+
     def __init__(self, f, λ, radius = None, aberration = None):
         """
         Creates a Phase Binary Fresnel Zone Plate with a focal length equal to f for a wavelength λ
@@ -27,9 +29,15 @@ class BinaryFZP(DOE):
         t = t*bd.exp(1j*phase_shift)
         return t
 
+    def get_radial_transmittance(self, r, λ):
+
+        return self.get_transmittance(r, bd.zeros_like(r), λ)
+
 
 
 class FZP(DOE):
+    supports_wavelength_batch = True
+
     def __init__(self, f, λ, radius = None, aberration = None):
         """
         Creates a Phase Blazed (Ideal) Fresnel Zone Plate with a focal length equal to f for a wavelength λ
@@ -53,3 +61,20 @@ class FZP(DOE):
         phase_shift = -(2*bd.pi/λ * (bd.sqrt(self.f**2 + r_2) - self.f))
         t = t*bd.exp(1j*phase_shift)
         return t
+
+    def get_invariant_transmittance(self, xx, yy):
+
+        # only the circular boundary doesn't depend on the wavelength
+        if self.radius == None:
+            return None
+
+        return bd.where((xx**2 + yy**2) < self.radius**2, bd.ones_like(xx), bd.zeros_like(xx))
+
+    def get_wavelength_dependent_transmittance(self, xx, yy, λ):
+
+        r_2 = xx**2 + yy**2
+        return bd.exp(-1j*(2*bd.pi/λ * (bd.sqrt(self.f**2 + r_2) - self.f)))
+
+    def get_radial_transmittance(self, r, λ):
+
+        return self.get_transmittance(r, bd.zeros_like(r), λ)
@@ -5,6 +5,8 @@ from .diffractive_element import DOE
 
 
 class BinaryGrating(DOE):
+    wavelength_invariant = True
+
     def __init__(self, period, width, height, x0 = 0, y0 = 0):
         """
         Creates a binary (amplitude) rectangular grating at the point (x0, y0) with width width and height height
@@ -30,9 +32,21 @@ class BinaryGrating(DOE):
 
         return t
 
+    def get_separable_transmittance(self, x, y, λ):
+
+        t_x = bd.sign((x) % (self.period) - self.period/2)
+        t_x = bd.select([t_x==0, t_x==1, t_x==-1], [bd.ones_like(t_x), bd.ones_like(t_x),  bd.zeros_like(t_x)])
+        t_x = t_x*bd.where((x >= (self.x0 - self.width / 2)) & (x < (self.x0 + self.width / 2)), bd.ones_like(x), bd.zeros_like(x))
+
+        t_y = bd.where((y >= (self.y0 - self.height / 2)) & (y < (self.y0 + self.height / 2)), bd.ones_like(y), bd.zeros_like(y))
+
+        return t_x, t_y
+
 
 
 class PhaseGrating(DOE):
+    wavelength_invariant = True
+
     def __init__(self, period, width, height, x0 = 0, y0 = 0):
         """
         Creates a phase grating at the point (x0, y0) with width width and height height
@@ -57,3 +71,10 @@ class PhaseGrating(DOE):
         phase_shift = xx/self.period
         return t*bd.exp(1j*2*bd.pi*phase_shift)
 
+    def get_separable_transmittance(self, x, y, λ):
+
+        t_x = bd.where((x > (self.x0 - self.width / 2)) & (x < (self.x0 + self.width / 2)), bd.ones_like(x), bd.zeros_like(x))
+        t_y = bd.where((y > (self.y0 - self.height / 2)) & (y < (self.y0 + self.height / 2)), bd.ones_like(y), bd.zeros_like(y))
+
+        phase_shift = x/self.period
+        return t_x*bd.exp(1j*2*bd.pi*phase_shift), t_y
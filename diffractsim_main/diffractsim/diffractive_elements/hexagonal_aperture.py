@@ -5,6 +5,8 @@ from .diffractive_element import DOE
 from PIL import Image,ImageDraw
 
 class HexagonalAperture(DOE):
+    wavelength_invariant = True
+
     def __init__(self, radius):
         """
         Creates a hexagonal slit
@@ -16,7 +18,8 @@ class HexagonalAperture(DOE):
     def get_transmittance(self, xx, yy, λ):
 
 
-        Ny,Nx = xx.shape
+        # xx and yy can be broadcastable (1, Nx) and (Ny, 1) arrays
+        Ny,Nx = yy.shape[0], xx.shape[-1]
         dx = xx[0,1]-xx[0,0]
         dy = yy[1,0]-yy[0,0]
 
@@ -4,6 +4,8 @@ from .diffractive_element import DOE
 from ..util.scaled_FT import scaled_fourier_transform
 
 class Lens(DOE):
+    supports_wavelength_batch = True
+
     def __init__(self,f, radius = None, aberration = None):
         """
         Creates a thin lens with a focal length equal to f. 
@@ -36,6 +38,41 @@ class Lens(DOE):
         return t
 
 
+    def get_invariant_transmittance(self, xx, yy):
+
+        # only the circular boundary doesn't depend on the wavelength
+        if self.radius == None:
+            return None
+
+        return bd.where((xx**2 + yy**2) < self.radius**2, bd.ones_like(xx), bd.zeros_like(xx))
+
+
+    def get_wavelength_dependent_transmittance(self, xx, yy, λ):
+
+        t = bd.exp(-1j*bd.pi/(λ*self.f) * (xx**2 + yy**2))
+        if self.aberration != None:
+            t = t*bd.exp(2j * bd.pi / λ * self.aberration(xx, yy))
+        return t
+
+
+    def get_radial_transmittance(self, r, λ):
+
+        # the lens is rotationally symmetric only without aberrations
+        if self.aberration != None:
+            return None
+
+        return self.get_transmittance(r, bd.zeros_like(r), λ)
+
+
+    def get_separable_transmittance(self, x, y, λ):
+
+        # the lens phase is separable only without a circular boundary and aberrations
+        if self.aberration != None or self.radius != None:
+            return None
+
+        return bd.exp(-1j*bd.pi/(λ*self.f) * x**2), bd.exp(-1j*bd.pi/(λ*self.f) * y**2)
+
+
 
 
     def get_coherent_PSF(self,  xx, yy, z, λ):
@@ -48,10 +85,11 @@ class Lens(DOE):
 
         if (self.aberration != None) and (self.radius != None):
 
-            if bd == np:
-                from scipy import special
-            else: 
+            from ..util.backend_functions import backend_name
+            if backend_name == 'cupy':
                 from cupyx.scipy import special
+            else: 
+                from scipy import special
 
             # we use an analytical solution:
 
@@ -3,6 +3,8 @@ from ..util.backend_functions import backend as bd
 from .diffractive_element import DOE
 
 class RectangularSlit(DOE):
+    wavelength_invariant = True
+
     def __init__(self, width, height, x0 = 0, y0 = 0):
 
         """
@@ -25,3 +27,10 @@ class RectangularSlit(DOE):
                         bd.ones_like(xx), bd.zeros_like(xx))
 
         return t
+
+    def get_separable_transmittance(self, x, y, λ):
+
+        t_x = bd.where((x >= (self.x0 - self.width / 2)) & (x < (self.x0 + self.width / 2)), bd.ones_like(x), bd.zeros_like(x))
+        t_y = bd.where((y >= (self.y0 - self.height / 2)) & (y < (self.y0 + self.height / 2)), bd.ones_like(y), bd.zeros_like(y))
+
+        return t_x, t_y
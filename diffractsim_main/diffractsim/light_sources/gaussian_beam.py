@@ -3,6 +3,8 @@ from ..util.backend_functions import backend as bd
 from .light_source import LightSource
 
 class GaussianBeam(LightSource):
+    supports_wavelength_batch = True
+
     def __init__(self, w0):
         """
         Creates a Gaussian beam with waist radius equal to w0
@@ -17,3 +19,11 @@ class GaussianBeam(LightSource):
         r2 = xx**2 + yy**2 
         E = E*bd.exp(-r2/(self.w0**2))
         return E
+
+    def get_radial_E(self, E, r, λ):
+
+        return E*bd.exp(-r**2/(self.w0**2))
+
+    def get_separable_E(self, E_x, E_y, x, y, λ):
+
+        return E_x*bd.exp(-x**2/(self.w0**2)), E_y*bd.exp(-y**2/(self.w0**2))
@@ -1,10 +1,32 @@
 from abc import ABC, abstractmethod
 
 class LightSource(ABC):
+    # light sources whose get_E can be evaluated with a broadcast (Nλ, 1, 1) array of wavelengths set it to True,
+    # so PolychromaticField evaluates them once for each chunk of wavelengths
+    supports_wavelength_batch = False
+
     @abstractmethod
     def __init__(self):
         pass
 
     @abstractmethod
     def get_E(self, E, xx, yy, λ):
+        """
+        Return the field emitted by the source given the incident field E. As in DOE.get_transmittance,
+        xx and yy are the broadcastable (1, Nx) and (Ny, 1) coordinates x[None, :] and y[:, None].
+        """
         pass
+
+    def get_radial_E(self, E, r, λ):
+        """
+        Return the rotationally symmetric field emitted by the source evaluated at the radii r given the incident field E(r),
+        or None if the source field isn't rotationally symmetric. It's used by RadialField.
+        """
+        return None
+
+    def get_separable_E(self, E_x, E_y, x, y, λ):
+        """
+        Return the 1D factors (E_x, E_y) of the field E(x,y) = E_x(x) * E_y(y) emitted by the source given the factors of the
+        incident field, or None if the source field isn't separable. It's used by SeparableField.
+        """
+        return None
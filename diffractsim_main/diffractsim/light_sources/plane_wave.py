@@ -3,6 +3,8 @@ from ..util.backend_functions import backend as bd
 from .light_source import LightSource
 
 class PlaneWave(LightSource):
+    supports_wavelength_batch = True
+
     def __init__(self):
         """
         Creates a Gaussian beam with waist radius equal to w0
@@ -13,3 +15,11 @@ class PlaneWave(LightSource):
     def get_E(self, E, xx, yy, λ):
         
         return bd.ones_like(xx) * E
+
+    def get_radial_E(self, E, r, λ):
+
+        return E
+
+    def get_separable_E(self, E_x, E_y, x, y, λ):
+
+        return E_x, E_y
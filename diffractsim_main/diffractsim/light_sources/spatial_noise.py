@@ -29,7 +29,8 @@ class SpatialNoise(LightSource):
         x_extent = xx[0,-1] - xx[0,0] + xx[0,1] - xx[0,0] 
         y_extent = yy[-1,0] - yy[0,0] + yy[1,0] - yy[0,0] 
 
-        Ny , Nx = xx.shape
+        # xx and yy can be broadcastable (1, Nx) and (Ny, 1) arrays
+        Ny , Nx = yy.shape[0], xx.shape[-1]
 
         fx_extent = Nx/x_extent
         fy_extent = Ny/y_extent
@@ -3,11 +3,17 @@ import matplotlib.pyplot as plt
 import time
 import progressbar
 from .util.constants import *
-from .propagation_methods import angular_spectrum_method, two_steps_fresnel_method, bluestein_method, apply_transfer_function
+from .propagation_methods import angular_spectrum_method, angular_spectrum_slices, angular_spectrum_stack, band_limited_angular_spectrum_method, two_steps_fresnel_method, bluestein_method, apply_transfer_function, select_propagator, split_step_method
+from .propagation_methods import PSF_convolution, ConvolutionKernel, get_PSF_transfer_function, get_angular_spectrum_transfer_function
+from .propagation_methods import out_of_core_angular_spectrum_method, out_of_core_two_steps_fresnel_method
+from .propagation_methods.out_of_core import chunk_length
 
 import numpy as np
 from .util.backend_functions import backend as bd
 from .util.bluestein_FFT import bluestein_fft2
+from .util.fft_layout import get_layout, spectrum_fftfreq, forward_spectrum, inverse_spectrum, convert_layout
+from .diffractive_elements.diffractive_element import DOE
+from .util.precision import complex_dtype, real_dtype, match_precision
 
 
 """
@@ -19,7 +25,7 @@ All rights reserved.
 
 
 class MonochromaticField:
-    def __init__(self,  wavelength, extent_x, extent_y, Nx, Ny, intensity = 0.1 * W / (m**2)):
+    def __init__(self,  wavelength, extent_x, extent_y, Nx, Ny, intensity = 0.1 * W / (m**2), dtype = np.complex128, memmap_path = None, max_bytes = 1024**3, deferred = False, batch = None, batch_chunk = 8):
         """
         Initializes the field, representing the cross-section profile of a plane wave
 
@@ -31,42 +37,329 @@ class MonochromaticField:
         Nx: horizontal dimension of the grid 
         Ny: vertical dimension of the grid 
         intensity: intensity of the field
+        dtype: precision of the simulation. Use np.complex64 to keep the field in complex64 and the coordinates in float32, 
+               halving the memory and bandwidth required. By default (np.complex128) double precision is used.
+        memmap_path: if given, the field is stored in a memory-mapped .npy file with this name instead of in memory (out-of-core mode),
+                     allowing grids larger than the available RAM. In this mode, add, propagate (with scale_factor = 1) and scale_propagate process the field in 
+                     chunks. The other methods load the whole field in memory.
+        max_bytes: memory budget in bytes of the chunks used in out-of-core mode
+        deferred: if True, add, propagate (with scale_factor = 1), apply_PSF and apply_transfer_function only record the operations,
+                  which are computed together when the field E is read (or when evaluate is called). Adjacent diffractive elements are
+                  multiplied into a single transmittance, and consecutive spectral operations (propagations, PSF convolutions and
+                  transfer functions) share a single forward/inverse FFT pair, with the propagation distances merged into one kernel.
+                  The attribute deferred can be changed at any moment.
+        batch: if given, the simulation holds a (batch, Ny, Nx) stack of fields sharing the grid, the wavelength and the optical elements
+               (for example a sequence of DMD patterns or hologram candidates, which can be assigned to E). The transmittances of the elements 
+               are broadcasted over the stack, and propagate (with scale_factor = 1), scale_propagate and zoom_propagate use FFTs batched over 
+               the last two axes. Any (B, Ny, Nx) field assigned to E is also propagated as a stack.
+        batch_chunk: maximum number of fields of the stack propagated at once, bounding the memory used by the FFT temporaries
+        """
+
+        if memmap_path is not None and deferred:
+            raise ValueError("deferred mode isn't available for out-of-core fields")
+        if memmap_path is not None and batch is not None:
+            raise ValueError("batched fields aren't available for out-of-core fields")
+
+        self._init_grid(wavelength, extent_x, extent_y, Nx, Ny, dtype = dtype, out_of_core = memmap_path is not None, 
+                        max_bytes = max_bytes, deferred = deferred, batch_chunk = batch_chunk)
+
+        if self.out_of_core:
+            self.E = np.lib.format.open_memmap(memmap_path, mode = 'w+', dtype = self.dtype, shape = (self.Ny, self.Nx))
+            rows_per_chunk = chunk_length(self.Ny, self.Nx, np.dtype(self.dtype).itemsize, max_bytes)
+            for i in range(0, self.Ny, rows_per_chunk):
+                self.E[i:i + rows_per_chunk] = np.sqrt(intensity)
+        else:
+            shape = (self.Ny, self.Nx) if batch is None else (batch, self.Ny, self.Nx)
+            self.E = bd.ones(shape, dtype = self.real_dtype) * bd.sqrt(intensity)
+
+
+    def _init_grid(self, wavelength, extent_x, extent_y, Nx, Ny, dtype = np.complex128, out_of_core = False, max_bytes = 1024**3, deferred = False, batch_chunk = 8):
+        """
+        Initialize the coordinates, the precision and the simulation state without allocating the field.
+        Subclasses storing the field in another representation (see SeparableField) call it instead of __init__.
+        The parameters are the same than in __init__.
         """
         global bd
         global backend_name
         from .util.backend_functions import backend as bd
         from .util.backend_functions import backend_name
-        
+
         self.extent_x = extent_x
         self.extent_y = extent_y
 
+        self.dtype = complex_dtype(dtype)
+        self.real_dtype = real_dtype(dtype)
+
         self.dx = extent_x/Nx
         self.dy = extent_y/Ny
 
-        self.x = self.dx*(bd.arange(Nx)-Nx//2)
-        self.y = self.dy*(bd.arange(Ny)-Ny//2)
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
+        self.x = (self.dx*(bd.arange(Nx)-Nx//2)).astype(self.real_dtype)
+        self.y = (self.dy*(bd.arange(Ny)-Ny//2)).astype(self.real_dtype)
 
         self.Nx = Nx
         self.Ny = Ny
-        self.E = bd.ones((self.Ny, self.Nx)) * bd.sqrt(intensity)
+
+        self.out_of_core = out_of_core
+        self.max_bytes = max_bytes
+        self.batch_chunk = batch_chunk
+        self.deferred = deferred
+        self._pending = []
         self.λ = wavelength
         self.z = 0
         self.cs = cf.ColourSystem(clip_method = 0)
         
+    # Only the 1D coordinates x and y are stored. The optical elements are evaluated with the broadcastable (1, Nx) and (Ny, 1) 
+    # coordinates x[None, :] and y[:, None], and the 2D coordinate grids xx and yy are returned as read-only broadcast views
+    # of x and y, which don't allocate memory.
+    @property
+    def xx(self):
+        return bd.broadcast_to(self.x[None, :], (len(self.y), len(self.x)))
+
+    @property
+    def yy(self):
+        return bd.broadcast_to(self.y[:, None], (len(self.y), len(self.x)))
+
+
+    @property
+    def E(self):
+        # in deferred mode, the pending operations are computed on the first read of the field
+        if len(self._pending) > 0:
+            self.evaluate()
+        return self._E
+
+    @E.setter
+    def E(self, E):
+        # assigning the field replaces the result of the pending operations
+        self._pending = []
+        self._E = E
+
+
+    def evaluate(self):
+        """
+        Compute the operations recorded in deferred mode. Adjacent diffractive elements are multiplied into a single transmittance, 
+        and consecutive spectral operations are computed with a single forward/inverse FFT pair.
+        """
+        global bd
+        from .util.backend_functions import backend as bd
+
+        pending = self._pending
+        self._pending = []
+        E = self._E
+
+        i = 0
+        while i < len(pending):
+            kind = pending[i][0]
+            j = i + 1
+            while j < len(pending) and pending[j][0] == kind and kind != 'source':
+                j += 1
+            group = pending[i:j]
+
+            if kind == 'source':
+                E = match_precision(group[0][1].get_E(E, self.x[None, :], self.y[:, None], self.λ), self.dtype)
+
+            elif kind == 'transmittance':
+                xx, yy = self.x[None, :], self.y[:, None]
+                t = match_precision(group[0][1].get_transmittance(xx, yy, self.λ), self.dtype)
+                for _, optical_element in group[1:]:
+                    t = t * match_precision(optical_element.get_transmittance(xx, yy, self.λ), self.dtype)
+                E = match_precision(E * t, self.dtype)
+
+            else:
+                # spectral operations: the propagation distances are summed into a single transfer function
+                H = None
+                z = 0
+                for _, operation, argument in group:
+                    if operation == 'propagate':
+                        z += argument
+                        continue
+                    elif operation == 'PSF' and isinstance(argument, ConvolutionKernel):
+                        argument.check_grid(self)
+                        H_operation = match_precision(argument.get_transfer_function(), self.dtype)
+                    elif operation == 'PSF':
+                        H_operation = get_PSF_transfer_function(self, argument, self.dtype)
+                    else:
+                        H_operation = match_precision(argument, self.dtype)
+                    H = H_operation if H is None else H * H_operation
+                if z != 0:
+                    H_z = get_angular_spectrum_transfer_function(self.Nx, self.Ny, self.dx, self.dy, self.λ, z, dtype = self.dtype)
+                    H = H_z if H is None else H * H_z
+                E = self._map_batch(lambda E: inverse_spectrum(forward_spectrum(E) * H), E)
+
+            i = j
+
+        self._E = E
+
+
     def add(self, optical_element):
 
-        self.E = optical_element.get_E(self.E, self.xx, self.yy, self.λ)
+        if self.deferred:
+            self._pending.append(('transmittance' if isinstance(optical_element, DOE) else 'source', optical_element))
+        elif self.out_of_core:
+            # apply the element to each chunk of rows with its own coordinate grids
+            rows_per_chunk = chunk_length(self.Ny, self.Nx, np.dtype(self.dtype).itemsize, self.max_bytes)
+            for i in range(0, self.Ny, rows_per_chunk):
+                rows = slice(i, min(i + rows_per_chunk, self.Ny))
+                E = match_precision(optical_element.get_E(bd.asarray(self.E[rows]), self.x[None, :], self.y[rows, None], self.λ), self.dtype)
+                self.E[rows] = E.get() if backend_name == 'cupy' else np.asarray(E)
+            self.E.flush()
+        else:
+            self.E = match_precision(optical_element.get_E(self.E, self.x[None, :], self.y[:, None], self.λ), self.dtype)
 
 
-    def propagate(self, z, scale_factor = 1):
+    def propagate(self, z, scale_factor = 1, band_limited = False):
         """
         Compute the field in distance equal to z with the angular spectrum method
         The ouplut plane coordinates is the same than the input.
+
+        The transfer function is stored in a LRU cache (see set_kernel_cache_size and get_kernel_cache_info), 
+        so repeated propagations with the same grid, wavelength and distance only cost the FFT pair.
+
+        If band_limited is True, the band-limited angular spectrum method is used instead: the field is zero padded 
+        the minimal amount required to avoid the wrap-around of the light diffracted outside the grid at distance z, 
+        which is useful for long propagation distances. It's only available with scale_factor = 1.
         """
 
+        # the arguments are validated before updating the simulation state
+        if self.out_of_core and (scale_factor != 1 or band_limited):
+            raise ValueError("out-of-core propagation is only available with scale_factor = 1 and band_limited = False")
+        if band_limited and scale_factor != 1:
+            raise ValueError("band_limited propagation is only available with scale_factor = 1")
+        if scale_factor != 1 and self.E.ndim > 2:
+            raise ValueError("batched fields can only be propagated with scale_factor = 1. Use scale_propagate instead")
+
         self.z += z
-        self.E = angular_spectrum_method(self, self.E, z, self.λ, scale_factor = scale_factor)
+        if self.deferred and scale_factor == 1 and not band_limited:
+            self._pending.append(('spectral', 'propagate', z))
+        elif self.out_of_core:
+            self.E = out_of_core_angular_spectrum_method(self, self.E, z, self.λ, self.max_bytes)
+        elif band_limited:
+            self.E = self._map_batch(lambda E: band_limited_angular_spectrum_method(self, E, z, self.λ), self.E)
+        elif scale_factor == 1:
+            self.E = self._map_batch(lambda E: angular_spectrum_method(self, E, z, self.λ), self.E)
+        else:
+            self.E = angular_spectrum_method(self, self.E, z, self.λ, scale_factor = scale_factor)
+
+
+    def apply_PSF(self, PSF, compact = False):
+        """
+        Convolve the field with the given coherent point spread function (PSF) sampled in spatial simulation coordinates (see PSF_convolution).
+        To apply the same PSF several times, pass a ConvolutionKernel, which stores its Fourier transform.
+
+        If compact is True, the support of the PSF is detected and the convolution is computed with small overlap-save blocks 
+        or directly when it's cheaper (see compact_convolution). Compact convolutions are computed in the spatial domain, 
+        so they aren't deferred.
+        """
+
+        if compact:
+            self.E = PSF_convolution(self, self.E, self.λ, PSF, compact = True)
+        elif self.deferred:
+            self._pending.append(('spectral', 'PSF', PSF))
+        else:
+            self.E = PSF_convolution(self, self.E, self.λ, PSF)
+
+
+    def apply_transfer_function(self, H, layout = 'centered'):
+        """
+        Apply the amplitude transfer function H to the field in the frequency domain (see apply_transfer_function).
+        By default, H is sampled in centered coordinates. Use layout = 'native' to pass H sampled in unshifted FFT order.
+        """
+
+        if self.deferred:
+            self._pending.append(('spectral', 'transfer_function', convert_layout(H, layout)))
+        else:
+            self.E = apply_transfer_function(self, self.E, self.λ, H, layout = layout)
+
+
+    def _map_batch(self, function, E):
+        """
+        Return function(E). If E is a stack of fields (B, Ny, Nx), function is applied to chunks of at most batch_chunk fields, 
+        so the temporary arrays of the FFTs are bounded by the chunk size.
+        """
+
+        if E.ndim == 2 or E.shape[0] <= self.batch_chunk:
+            return function(E)
+
+        if backend_name == 'jax':
+            return bd.concatenate([function(E[i:i + self.batch_chunk]) for i in range(0, E.shape[0], self.batch_chunk)], axis = 0)
+
+        out = None
+        for i in range(0, E.shape[0], self.batch_chunk):
+            E_chunk = function(E[i:i + self.batch_chunk])
+            if out is None:
+                out = bd.empty((E.shape[0],) + E_chunk.shape[1:], dtype = E_chunk.dtype)
+            out[i:i + self.batch_chunk] = E_chunk
+        return out
+
+
+    def propagate_auto(self, z, output_window = None):
+        """
+        Compute the field in distance equal to z with the cheapest propagation method which is valid for the current sampling, 
+        wavelength and distance: propagate (angular spectrum method), propagate with band_limited = True, scale_propagate 
+        (two-step Fresnel) or zoom_propagate (Bluestein method).
+
+        The sampling criteria of each method and the validity of the Fresnel approximation are checked, and the cost of the
+        valid methods is estimated from the sizes of their FFTs. The choice and its reason are logged with the logging module
+        (logger 'diffractsim.propagation_methods.propagator_selection', INFO level).
+
+        Parameters
+        ----------
+        output_window: None to compute the field in the same grid, or a sequence [x_interval, y_interval]
+                       with x_interval = [x1, x2] and y_interval = [y1, y2] giving the output plane range
+
+        Returns
+        -------
+        method: name of the method used
+        """
+
+        method, kwargs, reason = select_propagator(self.Nx, self.Ny, self.dx, self.dy, self.λ, z, output_window)
+
+        if method == 'band_limited':
+            self.propagate(z, band_limited = True)
+        else:
+            getattr(self, method)(z, **kwargs)
+
+        return method
+
+
+    def propagate_many(self, z, intensity_only = False, max_bytes = 256 * 1024**2, output_file = None):
+        """
+        Compute the field at each distance of the list z (measured from the current plane) with the angular spectrum method
+        and return a (len(z), Ny, Nx) stack. The field of the simulation isn't modified.
+
+        The angular spectrum is computed only once, and the planes are obtained in chunks with batched inverse FFTs.
+
+        Parameters
+        ----------
+        z: list or array of propagation distances
+        intensity_only: if True, return the intensity of each plane instead of the complex field
+        max_bytes: memory budget in bytes of the temporary arrays used to compute each chunk of planes
+        output_file: if given, the stack is written to a memory-mapped .npy file with this name (it can be loaded later with np.load(output_file, mmap_mode = 'r'))
+        """
+
+        return angular_spectrum_stack(self, self.E, z, self.λ, intensity_only = intensity_only, max_bytes = max_bytes, output_file = output_file)
+
+
+    def propagate_layers(self, phase_screens, z, aperture = None):
+        """
+        Propagate the field through a stack of thin phase screens separated by free space with the split-step method.
+        After each phase screen, the field is propagated a distance z with the angular spectrum method.
+        Equal spacings reuse the same cached transfer function, and the layers are computed in a single loop reusing the buffer 
+        of the transmittance (and, with the CPU-MT and FFTW backends, of the field), which is faster than alternating add and propagate for each layer.
+
+        Parameters
+        ----------
+        phase_screens: sequence of real arrays (or a (number of layers, Ny, Nx) array) with the phase in radians imparted by each layer
+        z: distance propagated after each phase screen. A single number for equally spaced layers, or a sequence with one distance per layer
+        aperture: optional (Ny, Nx) real array with the amplitude transmittance shared by all the layers
+        """
+
+        if self.out_of_core:
+            raise ValueError("propagate_layers isn't available for out-of-core fields")
+        if np.ndim(z) > 0 and len(z) != len(phase_screens):
+            raise ValueError("z must be a single distance or a sequence with one distance per phase screen")
+
+        self.z += np.sum(z) if np.ndim(z) > 0 else z * len(phase_screens)
+        self.E = split_step_method(self, self.E, phase_screens, z, self.λ, aperture = aperture)
 
 
     def scale_propagate(self, z, scale_factor):
@@ -83,10 +376,14 @@ class MonochromaticField:
         """
         
         self.z += z
-        self.x, self.y , self.E = two_steps_fresnel_method(self, self.E, z, self.λ, scale_factor)
-        self.dx = self.x[1] - self.x[0]
-        self.dy = self.y[1] - self.y[0]
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
+        if self.out_of_core:
+            self.x, self.y = out_of_core_two_steps_fresnel_method(self, self.E, z, self.λ, scale_factor, self.max_bytes)
+        else:
+            self.E = self._map_batch(lambda E: two_steps_fresnel_method(self, E, z, self.λ, scale_factor)[2], self.E)
+            self.x, self.y = self.x*scale_factor, self.y*scale_factor
+        # the spacing isn't computed from the coordinates, as they can be stored in single precision
+        self.dx = self.dx*scale_factor
+        self.dy = self.dy*scale_factor
         self.extent_x = self.Nx*self.dx
         self.extent_y = self.Ny*self.dy
 
@@ -112,10 +409,18 @@ class MonochromaticField:
         """
         
         self.z += z
-        self.x, self.y , self.E = bluestein_method(self, self.E, z, self.λ, x_interval, y_interval)
-        self.dx = self.x[1] - self.x[0]
-        self.dy = self.y[1] - self.y[0]
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
+        coordinates = []
+        def propagate_chunk(E):
+            x, y, E = bluestein_method(self, E, z, self.λ, x_interval, y_interval)
+            coordinates[:] = [x, y]
+            return E
+
+        self.E = self._map_batch(propagate_chunk, self.E)
+        x, y = coordinates
+        self.dx = x[1] - x[0]
+        self.dy = y[1] - y[0]
+        self.x = match_precision(x, self.real_dtype)
+        self.y = match_precision(y, self.real_dtype)
         self.extent_x = self.Nx*self.dx
         self.extent_y = self.Ny*self.dy
 
@@ -187,22 +492,18 @@ class MonochromaticField:
         # if the magnification is negative, the image is inverted
         if M < 0:
             self.E = bd.flip(self.E)
-        M_abs = bd.abs(M)
+        M_abs = abs(M)
 
         self.E = self.E/M_abs
 
-        fft_c = bd.fft.fft2(self.E)
-        c = bd.fft.fftshift(fft_c)
-        fx = bd.fft.fftshift(bd.fft.fftfreq(self.Nx, d = self.x[1]-self.x[0]))/M_abs
-        fy = bd.fft.fftshift(bd.fft.fftfreq(self.Ny, d = self.y[1]-self.y[0]))/M_abs
+        fx = spectrum_fftfreq(self.Nx, self.x[1]-self.x[0])/M_abs
+        fy = spectrum_fftfreq(self.Ny, self.y[1]-self.y[0])/M_abs
         fxx, fyy = bd.meshgrid(fx, fy)
 
         H = pupil.get_amplitude_transfer_function(fxx, fyy, zi, self.λ)
 
-        self.E = apply_transfer_function(self, self.E, self.λ, H, scale_factor)
+        self.E = apply_transfer_function(self, self.E, self.λ, H, scale_factor, layout = get_layout())
 
-        self.xx = M_abs * self.xx
-        self.yy = M_abs * self.yy
         self.x = M_abs * self.x
         self.y = M_abs * self.y
         self.dx = M_abs * self.dx
@@ -241,15 +542,17 @@ class MonochromaticField:
         nn, mm = bd.meshgrid((bd.linspace(0,(self.Nx-1),self.Nx)*dfx_zfft/dfx ), (bd.linspace(0,(self.Ny-1),self.Ny)*dfy_zfft/dfy ))
         ft_factor = (self.dx*self.dy* bd.exp(bd.pi*1j * (nn + mm)))
 
-        self.x = fx_zfft*(focal_length*self.λ)
-        self.y = fy_zfft*(focal_length*self.λ)
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
-        self.dx = self.x[1] - self.x[0]
-        self.dy = self.y[1] - self.y[0]
-        self.extent_x = self.x[-1] - self.x[0] + self.dx
-        self.extent_y = self.y[-1] - self.y[0] + self.dy
+        # the output coordinates and the phase are computed in double precision, and only then casted to the precision of the simulation
+        x = fx_zfft.astype(bd.float64)*(focal_length*self.λ)
+        y = fy_zfft.astype(bd.float64)*(focal_length*self.λ)
+        self.dx = float(x[1] - x[0])
+        self.dy = float(y[1] - y[0])
+        self.extent_x = float(x[-1] - x[0]) + self.dx
+        self.extent_y = float(y[-1] - y[0]) + self.dy
+        self.x = match_precision(x, self.real_dtype)
+        self.y = match_precision(y, self.real_dtype)
         
-        self.E = C*ft_factor * bd.exp(1j*bd.pi/(self.λ*focal_length)  * (self.xx**2 + self.yy**2)  +   1j*2*bd.pi/self.λ * focal_length ) / (1j*focal_length*self.λ)
+        self.E = C*match_precision(ft_factor * bd.exp(1j*bd.pi/(self.λ*focal_length)  * (x[None, :]**2 + y[:, None]**2)  +   1j*2*bd.pi/self.λ * focal_length ) / (1j*focal_length*self.λ), self.dtype)
         self.z += focal_length
 
 
@@ -260,7 +563,7 @@ class MonochromaticField:
         I = bd.real(self.E * bd.conjugate(self.E))  
 
         rgb = self.cs.wavelength_to_sRGB(self.λ / nm, 10 * I.ravel()).T.reshape(
-            (self.Ny, self.Nx, 3)
+            I.shape + (3,)
         )
         return rgb
 
@@ -310,60 +613,78 @@ class MonochromaticField:
         self.dx = self.extent_x/Nx
         self.dy = self.extent_y/Ny
 
-        self.E = bd.array(fun_real(self.dx*(np.arange(Nx)-Nx//2), self.dy*(np.arange(Ny)-Ny//2))  +  fun_imag(self.dx*(np.arange(Nx)-Nx//2), self.dy*(np.arange(Ny)-Ny//2))*1j)
+        self.E = bd.array(fun_real(self.dx*(np.arange(Nx)-Nx//2), self.dy*(np.arange(Ny)-Ny//2))  +  fun_imag(self.dx*(np.arange(Nx)-Nx//2), self.dy*(np.arange(Ny)-Ny//2))*1j, dtype = self.dtype)
 
 
-        self.x = self.dx*(bd.arange(Nx)-Nx//2)
-        self.y = self.dy*(bd.arange(Ny)-Ny//2)
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
+        self.x = (self.dx*(bd.arange(Nx)-Nx//2)).astype(self.real_dtype)
+        self.y = (self.dy*(bd.arange(Ny)-Ny//2)).astype(self.real_dtype)
 
 
 
 
-    def get_longitudinal_profile(self, start_distance, end_distance, steps, scale_factor = 1):
+    def get_longitudinal_profile(self, start_distance, end_distance, steps, scale_factor = 1, slice_index = None, axis = 'x', engine = 'slices'):
         """
         Propagates the field at n steps equally spaced between start_distance and end_distance, and returns
-        the colors and the field over the xz plane
+        the colors and the field over the xz plane (or the yz plane if axis = 'y')
+
+        Parameters
+        ----------
+        slice_index: index of the row (axis = 'x') or column (axis = 'y') to extract. By default the center of the grid is used.
+                     A list of indices can be passed to extract multiple slices at once. In this case, the returned arrays
+                     have an additional axis: (steps, len(slice_index), N) for the field and (steps, len(slice_index), N, 3) for the colors.
+        axis: 'x' to extract rows (xz plane) or 'y' to extract columns (yz plane)
+        engine: 'slices' (default) computes the angular spectrum once and evaluates only the selected slices at each step, 
+                requiring a 1D inverse FFT instead of a full propagation per step. 
+                'full' propagates the whole field at each step. It's always used when scale_factor != 1.
         """
 
         z = bd.linspace(start_distance, end_distance, steps)
 
-        self.E0 = self.E.copy()
+        N = self.Nx if axis == 'x' else self.Ny
+        if slice_index is None:
+            slice_index = (self.Ny if axis == 'x' else self.Nx)//2
+        index = [slice_index] if np.ndim(slice_index) == 0 else list(slice_index)
 
-        longitudinal_profile_rgb = bd.zeros((steps,self.Nx, 3))
-        longitudinal_profile_E = bd.zeros((steps,self.Nx), dtype = complex)
         z0 = self.z 
         t0 = time.time()
 
+        if scale_factor == 1 and engine == 'slices':
+            longitudinal_profile_E = angular_spectrum_slices(self, self.E, z, self.λ, index, axis = axis)
 
-        bar = progressbar.ProgressBar()
-        for i in bar(range(steps)):
+        else:
+            self.E0 = self.E.copy()
+            longitudinal_profile_E = bd.zeros((steps, len(index), N), dtype = self.dtype)
 
-            if scale_factor == 1:     
-                self.propagate(z[i])
-            else:
-                self.scale_propagate(z[i], scale_factor)
+            bar = progressbar.ProgressBar()
+            for i in bar(range(steps)):
 
-                self.extent_x/=scale_factor
-                self.extent_y/=scale_factor
+                if scale_factor == 1:     
+                    self.propagate(z[i])
+                else:
+                    self.scale_propagate(z[i], scale_factor)
 
-                self.dx/=scale_factor
-                self.dy/=scale_factor
-                self.x/=scale_factor
-                self.y/=scale_factor
+                    self.extent_x/=scale_factor
+                    self.extent_y/=scale_factor
 
-                self.xx/=scale_factor
-                self.yy/=scale_factor
+                    self.dx/=scale_factor
+                    self.dy/=scale_factor
+                    self.x/=scale_factor
+                    self.y/=scale_factor
 
-            rgb = self.get_colors()
-            if backend_name == 'jax':
-                longitudinal_profile_rgb = longitudinal_profile_rgb.at[i,:,:].set( rgb[self.Ny//2,:,:])
-                longitudinal_profile_E = longitudinal_profile_E.at[i,:].set(self.E[self.Ny//2,:])
-            else:
-                longitudinal_profile_rgb[i,:,:]  = rgb[self.Ny//2,:,:]
-                longitudinal_profile_E[i,:] = self.E[self.Ny//2,:]
-            self.E = np.copy(self.E0)
+                E_slices = self.E[index, :] if axis == 'x' else self.E[:, index].T
+                if backend_name == 'jax':
+                    longitudinal_profile_E = longitudinal_profile_E.at[i].set(E_slices)
+                else:
+                    longitudinal_profile_E[i] = E_slices
+                self.E = np.copy(self.E0)
+
+        # the colors are computed pixel by pixel, so they can be evaluated at once over the whole profile
+        I = bd.real(longitudinal_profile_E * bd.conjugate(longitudinal_profile_E))
+        longitudinal_profile_rgb = self.cs.wavelength_to_sRGB(self.λ / nm, 10 * I.ravel()).T.reshape(I.shape + (3,))
 
+        if np.ndim(slice_index) == 0:
+            longitudinal_profile_E = longitudinal_profile_E[:, 0, :]
+            longitudinal_profile_rgb = longitudinal_profile_rgb[:, 0, :, :]
 
         # restore intial values
         self.z = z0
@@ -371,7 +692,8 @@ class MonochromaticField:
 
         print ("Took", time.time() - t0)
 
-        extent = [self.x[0]*scale_factor, self.x[-1]*scale_factor, start_distance, end_distance]
+        coordinates = self.x if axis == 'x' else self.y
+        extent = [coordinates[0]*scale_factor, coordinates[-1]*scale_factor, start_distance, end_distance]
         return longitudinal_profile_rgb, longitudinal_profile_E, extent
 
     def __add__(self, Field):
@@ -381,7 +703,7 @@ class MonochromaticField:
         """
 
         if ((self.extent_x == Field.extent_x) and (self.extent_y == Field.extent_y) and (self.Nx == Field.Nx) and (self.Ny == Field.Ny) and (self.λ == Field.λ )):
-            mixed_field = MonochromaticField(self.λ, self.extent_x, self.extent_y, self.Nx, self.Ny)
+            mixed_field = MonochromaticField(self.λ, self.extent_x, self.extent_y, self.Nx, self.Ny, dtype = self.dtype)
             mixed_field.E = self.E + Field.E
             return mixed_field
 
@@ -5,11 +5,18 @@ from scipy.interpolate import interp2d
 from pathlib import Path
 from PIL import Image
 import time
+import copy
+import multiprocessing
 from .propagation_methods import angular_spectrum_method, two_steps_fresnel_method, apply_transfer_function
+from .propagation_methods.angular_spectrum_method import get_angular_spectrum_transfer_function
 
 import numpy as np
 from .util.backend_functions import backend as bd
 from .util.constants import *
+from .util.fft_layout import spectrum_fftfreq, forward_spectrum, inverse_spectrum
+from .util.precision import complex_dtype, real_dtype, match_precision
+from .util.shared_arrays import share_array, attach_array
+from .diffractive_elements.diffractive_element import DOE
 
 
 """
@@ -21,7 +28,22 @@ All rights reserved.
 
 
 class PolychromaticField:
-    def __init__(self, spectrum, extent_x, extent_y, Nx, Ny, spectrum_size = 180, spectrum_divisions = 30):
+    def __init__(self, spectrum, extent_x, extent_y, Nx, Ny, spectrum_size = 180, spectrum_divisions = 30, dtype = np.complex128):
+        """
+        Initializes the polychromatic field
+
+        Parameters
+        ----------
+        spectrum: spectral intensity of the light source, sampled on 380-780 nm interval with 400 samples
+        extent_x: length of the rectangular grid 
+        extent_y: height of the rectangular grid 
+        Nx: horizontal dimension of the grid 
+        Ny: vertical dimension of the grid 
+        spectrum_size: number of samples used to interpolate the spectrum
+        spectrum_divisions: number of wavelengths propagated
+        dtype: precision of the propagated fields. Use np.complex64 to keep the fields in complex64 and the coordinates in float32.
+               The colour accumulations are always computed in double precision.
+        """
         global bd
         global backend_name
         from .util.backend_functions import backend as bd
@@ -30,16 +52,18 @@ class PolychromaticField:
         self.extent_x = extent_x
         self.extent_y = extent_y
 
+        self.dtype = complex_dtype(dtype)
+        self.real_dtype = real_dtype(dtype)
+
         self.dx = extent_x/Nx
         self.dy = extent_y/Ny
 
-        self.x = self.dx*(bd.arange(Nx)-Nx//2)
-        self.y = self.dy*(bd.arange(Ny)-Ny//2)
-        self.xx, self.yy = bd.meshgrid(self.x, self.y)
+        self.x = (self.dx*(bd.arange(Nx)-Nx//2)).astype(self.real_dtype)
+        self.y = (self.dy*(bd.arange(Ny)-Ny//2)).astype(self.real_dtype)
 
         self.Nx = Nx
         self.Ny = Ny
-        self.E = bd.ones((self.Ny, self.Nx))
+        self.E = bd.ones((self.Ny, self.Nx), dtype = self.real_dtype)
 
         if not(spectrum_size/spectrum_divisions).is_integer():
             raise ValueError("spectrum_size/spectrum_divisions must be an integer")
@@ -52,10 +76,12 @@ class PolychromaticField:
         self.spectrum_divisions = spectrum_divisions
         self.dλ_partition = (780 - 380) / self.spectrum_divisions
         self.λ_list_samples = bd.arange(380, 780, self.dλ_partition)
-        self.spec_partitions = bd.split(self.spectrum, self.spectrum_divisions)
 
         self.cs = cf.ColourSystem(spectrum_size = spectrum_size, spec_divisions = spectrum_divisions, clip_method = 1)
 
+        # XYZ color of each spectrum partition, used to convert the intensity of each wavelength to XYZ colors with a single product
+        self.XYZ_weights = self.cs.spec_partition_weights(self.spectrum)
+
         self.z = 0
 
         self.steps = []
@@ -63,6 +89,18 @@ class PolychromaticField:
         self.steps_args = []
         self.optical_elements = []
         self.number_of_propagations = 0
+        self._invariant_steps = None
+
+    # Only the 1D coordinates x and y are stored. The optical elements are evaluated with the broadcastable (1, Nx) and (Ny, 1) 
+    # coordinates, and xx and yy are returned as read-only broadcast views of x and y (see MonochromaticField).
+    @property
+    def xx(self):
+        return bd.broadcast_to(self.x[None, :], (len(self.y), len(self.x)))
+
+    @property
+    def yy(self):
+        return bd.broadcast_to(self.y[:, None], (len(self.y), len(self.x)))
+
 
     def add(self, optical_element):
 
@@ -70,6 +108,7 @@ class PolychromaticField:
         self.steps += [optical_element]
         self.steps_type += ['optical_element']
         self.steps_args += [None]
+        self._invariant_steps = None
 
     def propagate(self, z, spectrum_divisions=40, grid_divisions=10):
         """compute the field in distance equal to z with the angular spectrum method"""
@@ -81,62 +120,278 @@ class PolychromaticField:
 
         scale_factor = 1
         self.steps_args += [[z, scale_factor]]
+        self._invariant_steps = None
 
 
-    def get_colors(self):
+    def set_adaptive_spectral_sampling(self, tolerance = 1e-2, max_path_difference = 2 * um, max_samples = None):
+        """
+        Replace the uniform sampling of the spectrum with spectrum_divisions wavelengths by the wavelengths and weights chosen by 
+        ColourSystem.adaptive_spec_samples, which concentrates the wavelengths where the product of the spectrum and the color matching 
+        functions is large. Narrow-band sources require much fewer propagations for the same colour error.
+        The chosen wavelengths are returned (in nm).
 
-        t0 = time.time()
+        Parameters
+        ----------
+        tolerance: target relative error of the XYZ colors
+        max_path_difference: largest optical path difference whose interference colors must be resolved. Larger values require more wavelengths.
+        max_samples: maximum number of wavelengths
+        """
 
-        propagation_index = np.zeros(self.spectrum_divisions)
+        λ, weights, error = self.cs.adaptive_spec_samples(self.spectrum, tolerance, max_path_difference / nm, max_samples)
 
-        kx = 2*bd.pi*bd.fft.fftshift(bd.fft.fftfreq(self.Nx, d = self.dx))
-        ky = 2*bd.pi*bd.fft.fftshift(bd.fft.fftfreq(self.Ny, d = self.dy))
-        kx, ky = bd.meshgrid(kx, ky)
+        self.λ_list_samples = bd.array(λ)
+        self.XYZ_weights = weights
+        self.spectrum_divisions = len(λ)
 
-        sRGB_linear = bd.zeros((3, self.Nx * self.Ny))
+        print ("Adaptive spectral sampling:", len(λ), "wavelengths, estimated colour error", "%.2e" % error)
+        return λ
 
-        bar = progressbar.ProgressBar()
 
-        # We compute the pattern of each wavelength separately, and associate it to small spectrum interval dλ = (780- 380)/spectrum_divisions . We approximately the final colour
-        # by summing the contribution of each small spectrum interval converting its intensity distribution to a RGB space.
-        
+    def get_colors(self, batched = True, max_bytes = 256 * 1024**2, workers = None):
+        """
+        Compute the colours of the field at the current distance, summing the intensity of each wavelength converted to the sRGB space.
+
+        With batched = True, the wavelengths are simulated in chunks stacked in (Nλ, Ny, Nx) arrays. The optical elements with 
+        supports_wavelength_batch = True are evaluated once per chunk with a broadcast wavelength axis, and the others one wavelength at a time. 
+        Each propagation is computed with a single batched FFT pair per chunk. On CPU backends, the FFTs dominate the computation time, 
+        so it's about as fast as batched = False: batching mainly reduces the per-wavelength overhead on GPU backends.
+
+        Parameters
+        ----------
+        batched: if False, each wavelength is simulated separately
+        max_bytes: memory budget in bytes of the arrays of each chunk of wavelengths. With workers, it's shared by all the processes
+        workers: number of processes used to simulate the wavelengths in parallel (only with the CPU backends). The result is identical to the serial computation
+        """
 
         t0 = time.time()
 
-        for i in bar(range(self.spectrum_divisions)):
+        if workers is not None and workers > 1:
+            sRGB_linear = self._render_in_pool(workers, '_color_contributions', (batched, max_bytes // workers), max_bytes)
+        else:
+            # the colour accumulations are computed in double precision
+            sRGB_linear = bd.zeros((3, self.Nx * self.Ny), dtype = bd.float64)
+            for sRGB_linear_λ in self._color_contributions(range(self.spectrum_divisions), batched, max_bytes):
+                sRGB_linear += sRGB_linear_λ
+
+        if backend_name == 'cupy':
+            bd.cuda.Stream.null.synchronize()
+        rgb = self.cs.sRGB_linear_to_sRGB(sRGB_linear)
+        rgb = (rgb.T).reshape((self.Ny, self.Nx, 3))
+        print ("Computation Took", time.time() - t0)
+        return rgb
+
+
+    def _get_invariant_steps(self):
+        """
+        Return the simulation steps with the wavelength invariant transmittances evaluated once for all the wavelengths.
+
+        Each group of consecutive DOEs is replaced by a single ('transmittance', t_0, elements) step, where t_0 is the product of 
+        their invariant transmittances (or None) and elements are the DOEs whose wavelength dependent transmittance must be applied
+        for each wavelength (see DOE.get_invariant_transmittance). Light sources and DOEs overriding get_E are kept as 
+        ('optical_element', element, None) steps, and propagations as ('propagation', method, [z, scale_factor]) steps.
+        The result is stored until a new step is added.
+        """
+
+        if self._invariant_steps is not None:
+            return self._invariant_steps
+
+        steps = []
+        for step, step_type, args in zip(self.steps, self.steps_type, self.steps_args):
+
+            if step_type == 'propagation':
+                steps += [('propagation', step, args)]
+
+            elif isinstance(step, DOE) and type(step).get_E is DOE.get_E:
+                if len(steps) == 0 or steps[-1][0] != 'transmittance':
+                    steps += [('transmittance', None, [])]
+                _, t_0, elements = steps[-1]
+
+                t = step.get_invariant_transmittance(self.x[None, :], self.y[:, None])
+                if t is not None:
+                    t = match_precision(bd.asarray(t), self.dtype)
+                    t_0 = t if t_0 is None else t_0 * t
+                if not step.wavelength_invariant:
+                    elements = elements + [step]
+                steps[-1] = ('transmittance', t_0, elements)
+
+            else:
+                steps += [('optical_element', step, None)]
+
+        self._invariant_steps = steps
+        return steps
+
+
+    def _color_contributions(self, indices, batched = True, max_bytes = 256 * 1024**2, progress = True):
+        """yield the linear sRGB contribution of each wavelength of the spectrum partitions with the given indices at the current distance, in order"""
+
+        bar = progressbar.ProgressBar() if progress else (lambda iterable: iterable)
+        steps = self._get_invariant_steps()
+
+        # only the angular spectrum method with scale_factor = 1 is batched. Other propagations are computed one wavelength at a time
+        if any(step is not angular_spectrum_method or args[1] != 1 for step_type, step, args in steps if step_type == 'propagation'):
+            batched = False
+
+        if not batched:
+            # We compute the pattern of each wavelength separately, and associate it to small spectrum interval dλ = (780- 380)/spectrum_divisions . We approximately the final colour
+            # by summing the contribution of each small spectrum interval converting its intensity distribution to a RGB space.
+            for i in bar(indices):
+
+                E_λ = self.E.copy()
+                propagation_index = 0
+                for step_type, step, args in steps:
+
+                    if step_type == 'transmittance':
+                        if step is not None:
+                            E_λ = E_λ * step
+                        for element in args:
+                            E_λ = match_precision(_get_wavelength_dependent_E(element, E_λ, self.x[None, :], self.y[:, None], self.λ_list_samples[i]* nm), self.dtype)
+
+                    elif step_type == 'optical_element':
+
+                        E_λ = match_precision(step.get_E(E_λ, self.x[None, :], self.y[:, None], self.λ_list_samples[i]* nm), self.dtype)
+
+                    else: #type == 'propagation'
+
+                        propagation_index += 1
+
+                        z, scale_factor = args
+
+                        E_λ = step(self, E_λ, z, self.λ_list_samples[i]* nm, scale_factor)
+
+                        if propagation_index == self.number_of_propagations:
+                            Iλ = bd.real(E_λ * bd.conjugate(E_λ))
+                            XYZ = self.cs.intensity_to_XYZ(Iλ, self.XYZ_weights[i])
+                            yield self.cs.XYZ_to_sRGB_linear(XYZ)
+            return
 
-            E_λ = self.E.copy()
-            for j in range(len(self.steps)):
+        # each wavelength of the chunk requires the field, its spectrum, its transfer function and the propagated field
+        chunk_size = int(max(1, max_bytes // (4 * self.Ny * self.Nx * np.dtype(self.dtype).itemsize)))
+        indices = list(indices)
 
-                if self.steps_type[j] == 'optical_element':
+        for i0 in bar(range(0, len(indices), chunk_size)):
+            chunk = indices[i0:i0 + chunk_size]
+            λ = self.λ_list_samples[bd.asarray(chunk)] * nm
 
-                    E_λ = self.steps[j].get_E(E_λ, self.xx, self.yy, self.λ_list_samples[i]* nm)
+            # the field is kept as a single (Ny, Nx) array until the first wavelength dependent step, 
+            # so the invariant transmittances and the first FFT are computed only once for the whole chunk
+            E = match_precision(self.E, self.dtype)
+            propagation_index = 0
+            for step_type, step, args in steps:
+
+                if step_type == 'transmittance':
+                    if step is not None:
+                        E = E * step
+                    for element in args:
+                        E = self._get_E_batch(lambda E, xx, yy, λ: _get_wavelength_dependent_E(element, E, xx, yy, λ), E, λ, element.supports_wavelength_batch)
+
+                elif step_type == 'optical_element':
+                    E = self._get_E_batch(step.get_E, E, λ, step.supports_wavelength_batch)
 
                 else: #type == 'propagation'
 
-                    propagation_index[i] += 1
+                    propagation_index += 1
+                    z, _ = args
+
+                    # the transfer functions of each wavelength are taken from the transfer function cache
+                    H = [get_angular_spectrum_transfer_function(self.Nx, self.Ny, self.dx, self.dy, λ[k], z, dtype = self.dtype) for k in range(len(chunk))]
+                    c = forward_spectrum(E)
+                    if backend_name == 'jax':
+                        c = c * bd.stack(H)
+                    elif c.ndim == 2:
+                        c_λ = bd.empty((len(chunk), self.Ny, self.Nx), dtype = bd.result_type(c, H[0]))
+                        for k in range(len(chunk)):
+                            bd.multiply(c, H[k], out = c_λ[k])
+                        c = c_λ
+                    else:
+                        for k in range(len(chunk)):
+                            bd.multiply(c[k], H[k], out = c[k])
+                    E = inverse_spectrum(c)
+
+                    if propagation_index == self.number_of_propagations:
+                        for k, i in enumerate(chunk):
+                            Iλ = bd.real(E[k] * bd.conjugate(E[k]))
+                            XYZ = self.cs.intensity_to_XYZ(Iλ, self.XYZ_weights[i])
+                            yield self.cs.XYZ_to_sRGB_linear(XYZ)
+
+
+    def _get_E_batch(self, get_E, E, λ, wavelength_batch):
+        """
+        Apply get_E(E, xx, yy, λ) of an optical element to the field E, which is a (Nλ, Ny, Nx) stack of fields with wavelengths λ, 
+        or a single (Ny, Nx) field shared by all of them. If wavelength_batch is True (see supports_wavelength_batch), the element is 
+        evaluated with a broadcast (Nλ, 1, 1) wavelength axis. Otherwise, it's evaluated separately for each wavelength.
+        """
 
-                    z, scale_factor = self.steps_args[j]
+        if wavelength_batch:
+            return match_precision(get_E(E, self.x[None, :], self.y[:, None], λ[:, None, None]), self.dtype)
 
-                    E_λ = self.steps[j](self, E_λ, z, self.λ_list_samples[i]* nm, scale_factor)
+        return bd.stack([match_precision(get_E(E[k] if E.ndim == 3 else E, self.x[None, :], self.y[:, None], λ[k]), self.dtype) for k in range(len(λ))])
 
-                    if propagation_index[i] == self.number_of_propagations:
-                        Iλ = bd.real(E_λ * bd.conjugate(E_λ))
-                        XYZ = self.cs.spec_partition_to_XYZ(bd.outer(Iλ, self.spec_partitions[i]),i)
-                        sRGB_linear += self.cs.XYZ_to_sRGB_linear(XYZ)
 
+    def _render_in_pool(self, workers, method, args = (), max_bytes = 256 * 1024**2):
+        """
+        Compute the colour accumulation of the spectrum partitions in a pool of processes and return the sRGB_linear array.
 
+        The spectrum partitions are processed in rounds. In each round, every process receives a contiguous block of partitions and 
+        stores the contribution of each of them, yielded by getattr(self, method)(indices, *args), in its own slot of a shared output buffer, 
+        whose size is bounded by max_bytes. The contributions are then summed by the main process in the order of the wavelengths, 
+        so the result is identical to the serial accumulation.
 
-        if backend_name == 'cupy':
-            bd.cuda.Stream.null.synchronize()
-        rgb = self.cs.sRGB_linear_to_sRGB(sRGB_linear)
-        rgb = (rgb.T).reshape((self.Ny, self.Nx, 3))
-        print ("Computation Took", time.time() - t0)
-        return rgb
+        The field and the coordinates are passed to the processes through shared memory instead of being pickled.
+        Where available, the processes are forked, so the optical elements (which may contain lambda functions) aren't pickled either.
+        """
+
+        if backend_name != 'numpy':
+            raise ValueError("the wavelengths can only be rendered in a pool of processes with the CPU backends")
+
+        # each partition of a block requires its slot in the output buffer and the arrays used to simulate it
+        N = self.Nx * self.Ny
+        block_size = int(max(1, max_bytes // (workers * (3 * N * 8 + 4 * N * np.dtype(self.dtype).itemsize))))
+        blocks = [list(range(i, min(i + block_size, self.spectrum_divisions))) for i in range(0, self.spectrum_divisions, block_size)]
+        workers = min(workers, len(blocks))
+
+        arrays = {'E': self.E, 'x': self.x, 'y': self.y}
+        shared = {name: share_array(a) for name, a in arrays.items()}
+        output = share_array(np.zeros((workers * block_size, 3, N), dtype = np.float64))
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            # the forked processes inherit the invariant transmittances evaluated by the main process
+            self._get_invariant_steps()
+        else:
+            context = multiprocessing.get_context()
+
+        # the arrays are attached again by the processes
+        state = copy.copy(self)
+        for name in arrays:
+            setattr(state, name, None)
+        if context.get_start_method() != 'fork':
+            state._invariant_steps = None
+
+        # the colour accumulations are computed in double precision
+        sRGB_linear = np.zeros((3, N), dtype = np.float64)
+        contributions = output[2]
+        bar = progressbar.ProgressBar()
+
+        try:
+            with context.Pool(workers, initializer = _init_worker, 
+                              initargs = (state, {name: s[1] for name, s in shared.items()}, output[1])) as pool:
 
+                for r in bar(range(0, len(blocks), workers)):
+                    round_blocks = blocks[r:r + workers]
+                    pool.map(_render_block, [(method, k * block_size, block, args) for k, block in enumerate(round_blocks)])
 
+                    for k, block in enumerate(round_blocks):
+                        for slot in range(k * block_size, k * block_size + len(block)):
+                            sRGB_linear += contributions[slot]
+        finally:
+            for block, _, _ in list(shared.values()) + [output]:
+                block.close()
+                block.unlink()
 
-    def get_colors_at_image_plane(self, pupil, M, zi, z0, scale_factor = 1):
+        return sRGB_linear
+
+
+    def get_colors_at_image_plane(self, pupil, M, zi, z0, scale_factor = 1, workers = None):
         """
         Assuming an optical system with linear response and assuming the system is only diffraction-limited by
         the exit pupil of the system, compute the field at its image plane
@@ -153,6 +408,8 @@ class PolychromaticField:
         M: magnification factor of the optical system
         (If the optical system is a single lens, magnification = - zi/z0)
 
+        workers: number of processes used to simulate the wavelengths in parallel (only with the CPU backends). The result is identical to the serial computation
+
         Reference:
         Introduction to Fourier Optics J. Goodman, Frequency Analysis of Optical Imaging Systems
         
@@ -161,52 +418,34 @@ class PolychromaticField:
 
 
         for j in range(len(self.optical_elements)):
-            self.E = self.E * self.optical_elements[j].get_transmittance(self.xx, self.yy, 0)
+            self.E = self.E * match_precision(self.optical_elements[j].get_transmittance(self.x[None, :], self.y[:, None], 0), self.dtype)
 
 
         # if the magnification is negative, the image is inverted
         if M < 0:
             self.E = bd.flip(self.E)
-        M_abs = bd.abs(M)
+        M_abs = abs(M)
 
         self.E = self.E/M_abs
 
-        fft_c = bd.fft.fft2(self.E)
-        c = bd.fft.fftshift(fft_c)
-
-        fx = bd.fft.fftshift(bd.fft.fftfreq(self.Nx, d = self.x[1]-self.x[0]))/M_abs
-        fy = bd.fft.fftshift(bd.fft.fftfreq(self.Ny, d = self.y[1]-self.y[0]))/M_abs
-        fxx, fyy = bd.meshgrid(fx, fy)
-
-        bar = progressbar.ProgressBar()
-
-        # We compute the pattern of each wavelength separately, and associate it to small spectrum interval dλ = (780- 380)/spectrum_divisions . We approximately the final colour
-        # by summing the contribution of each small spectrum interval converting its intensity distribution to a RGB space.
-        
-        sRGB_linear = bd.zeros((3, self.Nx * self.Ny))
-
         t0 = time.time()
 
-        for i in bar(range(self.spectrum_divisions)):
-            #Definte the ATF function, representing the Fourier transform of the circular pupil function.
-            H = pupil.get_amplitude_transfer_function(fxx, fyy, zi, self.λ_list_samples[i]* nm)
-
-            E_λ = bd.fft.ifft2(bd.fft.ifftshift(c*H))
-
-            Iλ = bd.real(E_λ * bd.conjugate(E_λ))
-
-            XYZ = self.cs.spec_partition_to_XYZ(bd.outer(Iλ, self.spec_partitions[i]),i)
-            sRGB_linear += self.cs.XYZ_to_sRGB_linear(XYZ)
+        if workers is not None and workers > 1:
+            sRGB_linear = self._render_in_pool(workers, '_color_contributions_at_image_plane', (pupil, zi, M_abs))
+        else:
+            # the colour accumulations are computed in double precision
+            sRGB_linear = bd.zeros((3, self.Nx * self.Ny), dtype = bd.float64)
+            for sRGB_linear_λ in self._color_contributions_at_image_plane(range(self.spectrum_divisions), pupil, zi, M_abs):
+                sRGB_linear += sRGB_linear_λ
 
         if backend_name == 'cupy':
             bd.cuda.Stream.null.synchronize()
 
-        self.xx = M_abs * self.xx
-        self.yy = M_abs * self.yy
         self.x = M_abs * self.x
         self.y = M_abs * self.y
         self.dx = M_abs * self.dx
         self.dy = M_abs * self.dy
+        self._invariant_steps = None
 
 
         rgb = self.cs.sRGB_linear_to_sRGB(sRGB_linear)
@@ -215,5 +454,70 @@ class PolychromaticField:
         return rgb
 
 
+    def _color_contributions_at_image_plane(self, indices, pupil, zi, M_abs, progress = True):
+        """yield the linear sRGB contribution of each wavelength of the spectrum partitions with the given indices at the image plane (see get_colors_at_image_plane)"""
+
+        c = forward_spectrum(self.E)
+
+        fx = spectrum_fftfreq(self.Nx, self.x[1]-self.x[0])/M_abs
+        fy = spectrum_fftfreq(self.Ny, self.y[1]-self.y[0])/M_abs
+        fxx, fyy = bd.meshgrid(fx, fy)
+
+        bar = progressbar.ProgressBar() if progress else (lambda iterable: iterable)
+
+        # We compute the pattern of each wavelength separately, and associate it to small spectrum interval dλ = (780- 380)/spectrum_divisions . We approximately the final colour
+        # by summing the contribution of each small spectrum interval converting its intensity distribution to a RGB space.
+        for i in bar(indices):
+            #Definte the ATF function, representing the Fourier transform of the circular pupil function.
+            H = match_precision(pupil.get_amplitude_transfer_function(fxx, fyy, zi, self.λ_list_samples[i]* nm), self.dtype)
+
+            E_λ = inverse_spectrum(c*H)
+
+            Iλ = bd.real(E_λ * bd.conjugate(E_λ))
+
+            XYZ = self.cs.intensity_to_XYZ(Iλ, self.XYZ_weights[i])
+            yield self.cs.XYZ_to_sRGB_linear(XYZ)
+
+
 
     from .visualization import plot_colors
+
+
+# state of the processes of the pool used by PolychromaticField._render_in_pool
+_worker_state = None
+_worker_blocks = []
+_worker_output = None
+
+
+def _init_worker(state, descriptors, output_descriptor):
+    global _worker_state, _worker_output
+    global bd
+    global backend_name
+    from .util.backend_functions import backend as bd
+    from .util.backend_functions import backend_name
+
+    for name, descriptor in descriptors.items():
+        block, a = attach_array(descriptor)
+        _worker_blocks.append(block)
+        setattr(state, name, a)
+
+    block, _worker_output = attach_array(output_descriptor)
+    _worker_blocks.append(block)
+    _worker_state = state
+
+
+def _render_block(task):
+    method, offset, indices, args = task
+
+    slots = _worker_output[offset:offset + len(indices)]
+    slots[...] = 0
+    for k, sRGB_linear_λ in enumerate(getattr(_worker_state, method)(indices, *args, progress = False)):
+        slots[k] = sRGB_linear_λ
+
+
+def _get_wavelength_dependent_E(element, E, xx, yy, λ):
+    # apply the wavelength dependent factor of the transmittance of the DOE (see DOE.get_invariant_transmittance)
+    t = element.get_wavelength_dependent_transmittance(xx, yy, λ)
+    if t is None:
+        return E
+    return E*match_precision(t, E)
@@ -9,8 +9,8 @@ def hermite_gaussian_mode(n,m, xx, yy, w0):
     ----------
     n: positive integer
     m: positive integer
-    xx: 2D numpy array
-    yy: 2D numpy array
+    xx: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
+    yy: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
     w0 : beam waist
     """
 
@@ -9,8 +9,8 @@ def laguerre_gaussian_mode(p,l,xx,yy,w0):
     ----------
     p: positive integer
     l: positive integer
-    xx: 2D numpy array
-    yy: 2D numpy array
+    xx: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
+    yy: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
     w0 : beam waist
     """
 
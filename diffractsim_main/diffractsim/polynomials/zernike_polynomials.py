@@ -10,8 +10,8 @@ def zernike_polynomial(n,m, x, y):
     ----------
     n: integer
     m: integer
-    x: 2D numpy array
-    y: 2D numpy array
+    x: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
+    y: 2D numpy array, or broadcastable coordinates like x[None, :] and y[:, None]
     """
 
     global bd
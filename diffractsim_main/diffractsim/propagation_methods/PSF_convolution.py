@@ -1,5 +1,9 @@
+import numpy as np
 from ..util.backend_functions import backend as bd
 from ..util.scaled_FT import scaled_fourier_transform
+from ..util.fft_layout import get_layout, spectrum_index, forward_spectrum, inverse_spectrum, convert_layout
+from ..util.precision import complex_dtype, match_precision
+from .compact_convolution import compact_convolution
 
 """
 MPL 2.0 License 
@@ -8,10 +12,17 @@ Copyright (c) 2022, Rafael de la Fuente
 All rights reserved.
 """
 
-def PSF_convolution(simulation, E, λ, PSF, scale_factor = 1):
+def PSF_convolution(simulation, E, λ, PSF, scale_factor = 1, compact = False, support_tolerance = 1e-12):
     """
     Convolve the field with a the given coherent point spread function (PSF) sampled in spatial simulation coordinates.
 
+    PSF can also be a ConvolutionKernel, which stores the Fourier transform of the PSF, 
+    so the convolution only costs a forward and an inverse FFT of the field.
+
+    If compact is True, the PSF is cropped to the region containing all its energy except a fraction support_tolerance,
+    and the convolution is computed with overlap-save blocks with small FFTs or directly, if it's estimated cheaper than 
+    the full-grid FFTs (see compact_convolution). It's only available with scale_factor = 1.
+
     Note: the angular spectrum propagation can be exactly reproduced with this method by using as PSF the Rayleigh-Sommerfeld kernel:
     PSF = 1 / (λ) * (1/(k * r) - 1j)  * (exp(j * k * r)* z/r ) where k = 2 * pi / λ  and r = sqrt(x**2 + y**2 + z**2)
     (Also called free space propagation impulse response function)
@@ -21,63 +32,190 @@ def PSF_convolution(simulation, E, λ, PSF, scale_factor = 1):
     global bd
     from ..util.backend_functions import backend as bd
 
-    nn_, mm_ = bd.meshgrid(bd.arange(simulation.Nx)-simulation.Nx//2, bd.arange(simulation.Ny)-simulation.Ny//2)
-    factor = ((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)))
+    # the scaled Fourier transform requires the spectrum sampled in centered coordinates
+    layout = get_layout() if scale_factor == 1 else 'centered'
 
+    if compact:
+        if scale_factor != 1 or isinstance(PSF, ConvolutionKernel):
+            raise ValueError("compact convolution is only available with scale_factor = 1 and a PSF array")
+        return compact_convolution(simulation, E, λ, PSF, tolerance = support_tolerance)
 
-    E_f = factor*bd.fft.fftshift(bd.fft.fft2(E))
-    
-    #Definte the ATF function, representing the Fourier transform of the PSF.
-    H = factor*bd.fft.fftshift(bd.fft.fft2(PSF))
+    if isinstance(PSF, ConvolutionKernel):
+        PSF.check_grid(simulation)
+        if scale_factor == 1:
+            return PSF.convolve(E)
 
+        E_f = forward_spectrum(E, layout)
+        H = match_precision(PSF.get_transfer_function(layout), complex_dtype(E.dtype))
 
-    if scale_factor == 1:
-        return bd.fft.ifft2(bd.fft.ifftshift(E_f*H /factor ))
+        nn_, mm_ = bd.meshgrid(spectrum_index(simulation.Nx, layout), spectrum_index(simulation.Ny, layout))
+        factor = match_precision((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)), complex_dtype(E.dtype))
+        E_f = factor*E_f
+
+    elif scale_factor == 1:
+        H = get_PSF_transfer_function(simulation, PSF, complex_dtype(E.dtype), layout)
+        return inverse_spectrum(forward_spectrum(E, layout)*H, layout)
 
     else:
-        fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.x[1]-simulation.x[0]))
-        fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.y[1]-simulation.y[0]))
-        fxx, fyy = bd.meshgrid(fx, fy)
-        extent_fx = (fx[1]-fx[0])*simulation.Nx
-        simulation.xx, simulation.yy, E = scaled_fourier_transform(fxx, fyy, E_f*H,  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
-        simulation.x = simulation.x*scale_factor
-        simulation.y = simulation.y*scale_factor
-        simulation.dx = simulation.dx*scale_factor
-        simulation.dy = simulation.dy*scale_factor
-        simulation.extent_x = simulation.extent_x*scale_factor
-        simulation.extent_y = simulation.extent_y*scale_factor
-        return E
+        nn_, mm_ = bd.meshgrid(spectrum_index(simulation.Nx, layout), spectrum_index(simulation.Ny, layout))
+        factor = match_precision((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)), complex_dtype(E.dtype))
+
+        E_f = factor*forward_spectrum(E, layout)
+
+        #Definte the ATF function, representing the Fourier transform of the PSF.
+        H = factor*forward_spectrum(match_precision(PSF, E), layout)
+
+    fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.x[1]-simulation.x[0]))
+    fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.y[1]-simulation.y[0]))
+    fxx, fyy = bd.meshgrid(fx, fy)
+    extent_fx = (fx[1]-fx[0])*simulation.Nx
+    _, _, E = scaled_fourier_transform(fxx, fyy, E_f*H,  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
+    simulation.x = simulation.x*scale_factor
+    simulation.y = simulation.y*scale_factor
+    simulation.dx = simulation.dx*scale_factor
+    simulation.dy = simulation.dy*scale_factor
+    simulation.extent_x = simulation.extent_x*scale_factor
+    simulation.extent_y = simulation.extent_y*scale_factor
+    return E
+
+
+
+class ConvolutionKernel:
+    def __init__(self, simulation, PSF, real_fft = None):
+        """
+        Reusable convolution kernel storing the Fourier transform of a coherent point spread function (PSF)
+        sampled in the spatial coordinates of the simulation. It can be passed as PSF argument to PSF_convolution and 
+        MonochromaticField.apply_PSF, so repeated convolutions with the same PSF (for example applying the same scattering PSF 
+        to many fields) only cost a forward and an inverse FFT of the field.
+
+        Parameters
+        ----------
+        simulation: simulation whose grid (Nx, Ny, dx, dy), precision and spectrum layout are used. The kernel can be 
+                    applied to any field sampled in the same grid.
+        PSF: point spread function sampled in the simulation coordinates (centered in the grid)
+        real_fft: if True, the PSF must be real, Nx and Ny must be even, and only the half spectrum returned by rfft2 is stored, halving its memory. 
+                  Real fields are then convolved with a single real FFT pair, and complex fields with a real FFT pair for their real 
+                  and imaginary parts. By default, it's True if these conditions are met.
+        """
+        global bd
+        from ..util.backend_functions import backend as bd
+
+        self.Nx, self.Ny = simulation.Nx, simulation.Ny
+        self.dx, self.dy = simulation.dx, simulation.dy
+        self.dtype = complex_dtype(simulation.dtype)
+        self.layout = get_layout()
+
+        # PSF_convolution moves the center of the PSF to the first sample with the phase factor exp(iπ(n + m)),
+        # which is only a real (integer) shift for even grid dimensions
+        even_grid = self.Nx % 2 == 0 and self.Ny % 2 == 0
+        if real_fft is None:
+            real_fft = PSF.dtype.kind != 'c' and even_grid
+        elif real_fft and (PSF.dtype.kind == 'c' or not even_grid):
+            raise ValueError("real_fft requires a real PSF and even grid dimensions Nx and Ny")
+        self.real_fft = real_fft
+
+        if self.real_fft:
+            # the center of the PSF (x = y = 0) is moved to the first sample
+            PSF = bd.fft.ifftshift(match_precision(PSF, self.dtype))
+            self.H = (self.dx * self.dy * bd.fft.rfft2(PSF)).astype(self.dtype)
+        else:
+            self.H = get_PSF_transfer_function(simulation, PSF, self.dtype, self.layout)
+
+
+    def check_grid(self, simulation):
+        if (simulation.Nx, simulation.Ny) != (self.Nx, self.Ny) or not np.isclose(simulation.dx, self.dx) or not np.isclose(simulation.dy, self.dy):
+            raise ValueError("the ConvolutionKernel was computed for a different grid than the one of the simulation")
+
+
+    def get_transfer_function(self, layout = None):
+        """return the full transfer function (Fourier transform of the PSF) sampled in the given layout (by default, the current layout)"""
+        global bd
+        from ..util.backend_functions import backend as bd
+
+        layout = get_layout(layout)
+
+        if self.real_fft:
+            # rebuild the negative frequencies with the hermitian symmetry of the spectrum of a real function: H(-f) = conj(H(f))
+            H_negative = bd.conj(self.H[:, 1:(self.Nx + 1)//2][:, ::-1])
+            H_negative = bd.roll(H_negative[::-1], 1, axis = 0)
+            H = bd.concatenate((self.H, H_negative), axis = 1)
+            return bd.fft.fftshift(H) if layout == 'centered' else H
+
+        if layout == self.layout:
+            return self.H
+        return bd.fft.fftshift(self.H) if layout == 'centered' else bd.fft.ifftshift(self.H)
+
+
+    def convolve(self, E):
+        """return the convolution of the field E with the PSF"""
+        global bd
+        from ..util.backend_functions import backend as bd
+
+        if not self.real_fft:
+            return inverse_spectrum(forward_spectrum(E, self.layout) * match_precision(self.H, complex_dtype(E.dtype)), self.layout)
+
+        H = match_precision(self.H, complex_dtype(E.dtype))
+        s = (self.Ny, self.Nx)
+        if E.dtype.kind != 'c':
+            return bd.fft.irfft2(bd.fft.rfft2(E) * H, s = s)
+        return bd.fft.irfft2(bd.fft.rfft2(E.real) * H, s = s) + 1j * bd.fft.irfft2(bd.fft.rfft2(E.imag) * H, s = s)
+
+
+
+def get_PSF_transfer_function(simulation, PSF, dtype, layout = None):
+    """
+    Return the amplitude transfer function of the coherent PSF sampled in spatial simulation coordinates, 
+    i.e. its Fourier transform sampled in the FFT frequency grid in the given layout (by default, the current spectrum layout).
+    The convolution of the field with the PSF is equal to inverse_spectrum(forward_spectrum(E) * H).
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
 
+    layout = get_layout(layout)
 
+    # the PSF is centered in the grid: the phase factor shifts its origin to the first sample
+    nn_, mm_ = bd.meshgrid(spectrum_index(simulation.Nx, layout), spectrum_index(simulation.Ny, layout))
+    factor = match_precision((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)), dtype)
 
-def apply_transfer_function(simulation, E, λ, H, scale_factor = 1):
+    return factor*forward_spectrum(match_precision(PSF, dtype), layout)
+
+
+
+def apply_transfer_function(simulation, E, λ, H, scale_factor = 1, layout = 'centered'):
     """
     Apply amplitude transfer function ATF (H) to the field in the frequency domain sampled in FFT simulation coordinates
 
+    By default, H is sampled in centered coordinates (zero frequency at the center of the array, fftshift order). 
+    Use layout = 'native' to pass H sampled in unshifted FFT order, avoiding the fftshift/ifftshift copies of the field.
+
     Note: the angular spectrum method amplitude transfer function equivalent is: H = exp(1j * kz * z)
     """
 
     
     global bd
     from ..util.backend_functions import backend as bd
-    import matplotlib.pyplot as plt
+
+    H = match_precision(H, E)
 
     if scale_factor == 1:
-        E_f = bd.fft.fftshift(bd.fft.fft2(E))
-        return bd.fft.ifft2(bd.fft.ifftshift(E_f*H ))
+        E_f = forward_spectrum(E, layout)
+        return inverse_spectrum(E_f*H, layout)
 
     else:
+        # the scaled Fourier transform requires the spectrum sampled in centered coordinates
+        H = convert_layout(H, layout, 'centered')
+
         fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.x[1]-simulation.x[0]))
         fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.y[1]-simulation.y[0]))
         fxx, fyy = bd.meshgrid(fx, fy)
 
         nn_, mm_ = bd.meshgrid(bd.arange(simulation.Nx)-simulation.Nx//2, bd.arange(simulation.Ny)-simulation.Ny//2)
-        factor = ((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)))
+        factor = match_precision((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)), complex_dtype(E.dtype))
 
-        E_f = factor*bd.fft.fftshift(bd.fft.fft2(E))
+        E_f = factor*forward_spectrum(E, layout = 'centered')
 
         extent_fx = (fx[1]-fx[0])*simulation.Nx
-        simulation.xx, simulation.yy, E = scaled_fourier_transform(fxx, fyy, E_f*H,  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
+        _, _, E = scaled_fourier_transform(fxx, fyy, E_f*H,  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
         simulation.x = simulation.x*scale_factor
         simulation.y = simulation.y*scale_factor
         simulation.dx = simulation.dx*scale_factor
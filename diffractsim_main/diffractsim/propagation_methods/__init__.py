@@ -1,4 +1,10 @@
-from .angular_spectrum_method import angular_spectrum_method
-from .two_steps_fresnel_method import two_steps_fresnel_method
-from .bluestein_method import bluestein_method
-from .PSF_convolution import PSF_convolution, apply_transfer_function
\ No newline at end of file
+from .angular_spectrum_method import angular_spectrum_method, get_angular_spectrum_kz, get_angular_spectrum_transfer_function, angular_spectrum_slices, angular_spectrum_stack
+from .band_limited_angular_spectrum_method import band_limited_angular_spectrum_method, get_band_limited_padding, get_band_limited_transfer_function
+from .two_steps_fresnel_method import two_steps_fresnel_method, two_steps_fresnel_method_1d
+from .bluestein_method import bluestein_method, bluestein_method_1d
+from .PSF_convolution import PSF_convolution, ConvolutionKernel, apply_transfer_function, get_PSF_transfer_function
+from .propagator_selection import select_propagator
+from .out_of_core import out_of_core_angular_spectrum_method, out_of_core_two_steps_fresnel_method
+from .radial_angular_spectrum_method import radial_angular_spectrum_method, get_radial_angular_spectrum_transfer_function
+from .split_step_method import split_step_method
+from .compact_convolution import compact_convolution, get_PSF_support
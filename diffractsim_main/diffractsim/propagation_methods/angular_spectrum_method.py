@@ -1,6 +1,10 @@
 import numpy as np
+import progressbar
 from ..util.backend_functions import backend as bd
 from ..util.scaled_FT import scaled_fourier_transform
+from ..util.kernel_cache import transfer_function_cache, cache_key
+from ..util.fft_layout import get_layout, spectrum_fftfreq, spectrum_index, forward_spectrum, inverse_spectrum
+from ..util.precision import complex_dtype, real_dtype, match_precision
 
 """
 MPL 2.0 License 
@@ -21,29 +25,29 @@ def angular_spectrum_method(simulation, E, z, λ, scale_factor = 1):
     global bd
     from ..util.backend_functions import backend as bd
 
-    # compute angular spectrum
-    fft_c = bd.fft.fft2(E)
-    c = bd.fft.fftshift(fft_c)
-
-    fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.dx))
-    fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.dy))
-    fxx, fyy = bd.meshgrid(fx, fy)
-
-    argument = (2 * bd.pi)**2 * ((1. / λ) ** 2 - fxx ** 2 - fyy ** 2)
-
-    #Calculate the propagating and the evanescent (complex) modes
-    tmp = bd.sqrt(bd.abs(argument))
-    kz = bd.where(argument >= 0, tmp, 1j*tmp)
-
+    # the transfer function is evaluated with the same precision than the field
+    dtype = complex_dtype(E.dtype)
 
     if scale_factor == 1:
 
+        # compute angular spectrum
+        c = forward_spectrum(E)
+
         # propagate the angular spectrum a distance z
-        E = bd.fft.ifft2(bd.fft.ifftshift(c * bd.exp(1j * kz * z)))
+        H = get_angular_spectrum_transfer_function(simulation.Nx, simulation.Ny, simulation.dx, simulation.dy, λ, z, dtype = dtype)
+        E = inverse_spectrum(c * H)
 
     else:
+        # the scaled Fourier transform requires the spectrum sampled in centered coordinates
+        c = forward_spectrum(E, layout = 'centered')
+
+        fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.dx))
+        fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.dy))
+        fxx, fyy = bd.meshgrid(fx, fy)
+        H = get_angular_spectrum_transfer_function(simulation.Nx, simulation.Ny, simulation.dx, simulation.dy, λ, z, layout = 'centered', dtype = dtype)
+
         nn_, mm_ = bd.meshgrid(bd.arange(simulation.Nx)-simulation.Nx//2, bd.arange(simulation.Ny)-simulation.Ny//2)
-        factor = ((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)))
+        factor = match_precision((simulation.dx *simulation.dy)* bd.exp(bd.pi*1j * (nn_ + mm_)), dtype)
 
 
         simulation.x = simulation.x*scale_factor
@@ -53,9 +57,184 @@ def angular_spectrum_method(simulation, E, z, λ, scale_factor = 1):
         simulation.dy = simulation.dy*scale_factor
 
         extent_fx = (fx[1]-fx[0])*simulation.Nx
-        simulation.xx, simulation.yy, E = scaled_fourier_transform(fxx, fyy, factor*c * bd.exp(1j * kz * z),  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
+        _, _, E = scaled_fourier_transform(fxx, fyy, factor*c * H,  λ = -1, scale_factor = simulation.extent_x/extent_fx * scale_factor, mesh = True)
         simulation.extent_x = simulation.extent_x*scale_factor
         simulation.extent_y = simulation.extent_y*scale_factor
 
     return E
 
+
+
+
+def _angular_spectrum_kz(Nx, Ny, dx, dy, λ, layout):
+
+    fx = spectrum_fftfreq(Nx, dx, layout)
+    fy = spectrum_fftfreq(Ny, dy, layout)
+    fxx, fyy = bd.meshgrid(fx, fy)
+
+    argument = (2 * bd.pi)**2 * ((1. / λ) ** 2 - fxx ** 2 - fyy ** 2)
+
+    #Calculate the propagating and the evanescent (complex) modes
+    tmp = bd.sqrt(bd.abs(argument))
+    return bd.where(argument >= 0, tmp, 1j*tmp)
+
+
+def get_angular_spectrum_kz(Nx, Ny, dx, dy, λ, layout = None):
+    """
+    Return the longitudinal wavenumber kz sampled in the FFT frequency grid of a Nx x Ny grid with spacing dx, dy.
+    By default, the current spectrum layout is used (see set_spectrum_layout).
+    The evanescent modes have an imaginary kz.
+    The result is stored in the transfer function cache.
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    layout = get_layout(layout)
+    key = cache_key('angular_spectrum_kz', backend_name, layout, Nx, Ny, dx, dy, λ)
+    return transfer_function_cache.get(key, lambda: _angular_spectrum_kz(Nx, Ny, dx, dy, λ, layout))
+
+
+def get_angular_spectrum_transfer_function(Nx, Ny, dx, dy, λ, z, layout = None, dtype = np.complex128):
+    """
+    Return the angular spectrum transfer function H = exp(1j * kz * z) sampled in the FFT frequency grid.
+    By default, the current spectrum layout is used (see set_spectrum_layout).
+    The phase kz * z is always computed in double precision and then casted to dtype.
+    The result is stored in the transfer function cache, so repeated propagations with the same grid, 
+    wavelength and distance only cost the FFT pair and one multiplication.
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    layout = get_layout(layout)
+    key = cache_key('angular_spectrum_H', backend_name, layout, np.dtype(dtype).str, Nx, Ny, dx, dy, λ, z)
+    return transfer_function_cache.get(key, lambda: bd.exp(1j * _angular_spectrum_kz(Nx, Ny, dx, dy, λ, layout) * z).astype(dtype))
+
+
+def angular_spectrum_slices(simulation, E, z, λ, index, axis = 'x'):
+    """
+    Compute the rows (axis = 'x') or the columns (axis = 'y') of the field propagated with the angular spectrum method
+    at each distance of the array z, without computing the full 2D inverse FFT.
+
+    The angular spectrum of E is computed once. For each distance, the spectrum is multiplied by the transfer function and
+    collapsed along the frequency axis orthogonal to the slices with a dot product with the Fourier weights of the selected indices, 
+    so only a 1D inverse FFT per slice is required. The cost of each step is O(Nx*Ny*len(index)) instead of O(Nx*Ny*log(Nx*Ny)).
+
+    Parameters
+    ----------
+    index: list of the row (axis = 'x') or column (axis = 'y') indices to compute
+    axis: 'x' to compute rows (xz plane) or 'y' to compute columns (yz plane)
+
+    Returns
+    -------
+    E_slices: array with shape (len(z), len(index), Nx) if axis = 'x', or (len(z), len(index), Ny) if axis = 'y'
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    dtype = complex_dtype(E.dtype)
+    layout = get_layout()
+    Nx, Ny = simulation.Nx, simulation.Ny
+
+    c = forward_spectrum(E, layout = layout)
+    kz = get_angular_spectrum_kz(Nx, Ny, simulation.dx, simulation.dy, λ, layout = layout)
+
+    # Fourier weights of the inverse DFT along the collapsed axis, evaluated at the selected indices.
+    # The integer product is reduced modulo N to keep the phases small.
+    N = Ny if axis == 'x' else Nx
+    k = spectrum_index(N, layout)
+    r = bd.array(index)
+    w = (bd.exp(2j * bd.pi * ((r[:, None] * k[None, :]) % N) / N) / N).astype(dtype)
+
+    E_slices = bd.zeros((len(z), len(index), Nx if axis == 'x' else Ny), dtype = dtype)
+
+    # For equally spaced distances, the spectrum is advanced with the transfer function of a single step, 
+    # avoiding the evaluation of the complex exponential at each step. 
+    # It's periodically recomputed from the initial spectrum to avoid the accumulation of rounding errors.
+    z = bd.asarray(z)
+    equally_spaced = len(z) > 2 and bool(bd.allclose(bd.diff(z), z[1] - z[0], rtol = 1e-9, atol = 0))
+    if equally_spaced:
+        H_step = bd.exp(1j * kz * (z[1] - z[0])).astype(dtype)
+
+    bar = progressbar.ProgressBar()
+    for i in bar(range(len(z))):
+        if equally_spaced and i % 32 != 0:
+            c_z0 = c_z0 * H_step
+        else:
+            c_z0 = c * bd.exp(1j * kz * z[i]).astype(dtype)
+        c_z = c_z0
+
+        if axis == 'x':
+            c_z = w @ c_z
+        else:
+            c_z = (c_z @ w.T).T
+
+        if layout == 'centered':
+            c_z = bd.fft.ifftshift(c_z, axes = -1)
+        E_z = bd.fft.ifft(c_z, axis = -1)
+
+        if backend_name == 'jax':
+            E_slices = E_slices.at[i].set(E_z)
+        else:
+            E_slices[i] = E_z
+
+    return E_slices
+
+
+def angular_spectrum_stack(simulation, E, z, λ, intensity_only = False, max_bytes = 256 * 1024**2, output_file = None):
+    """
+    Compute the field propagated with the angular spectrum method at each distance of the array z and return a (len(z), Ny, Nx) stack.
+
+    The angular spectrum of E is computed once. The propagated spectra are built in chunks of planes whose size is bounded by max_bytes,
+    and transformed back with a single batched inverse FFT per chunk.
+
+    Parameters
+    ----------
+    intensity_only: if True, the intensity of each plane is stored instead of the complex field, halving the size of the stack
+    max_bytes: memory budget in bytes of the temporary arrays of each chunk
+    output_file: if given, the stack is written to a memory-mapped .npy file with this name instead of being kept in memory.
+                 The returned array is the numpy memmap.
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    dtype = complex_dtype(E.dtype)
+    out_dtype = real_dtype(dtype) if intensity_only else dtype
+    Nx, Ny = simulation.Nx, simulation.Ny
+
+    c = forward_spectrum(E)
+    kz = get_angular_spectrum_kz(Nx, Ny, simulation.dx, simulation.dy, λ)
+
+    if output_file is not None:
+        stack = np.lib.format.open_memmap(output_file, mode = 'w+', dtype = out_dtype, shape = (len(z), Ny, Nx))
+    else:
+        stack = bd.zeros((len(z), Ny, Nx), dtype = out_dtype)
+
+    # each plane of the chunk requires the propagated spectrum and its inverse FFT
+    chunk_size = int(max(1, max_bytes // (2 * Ny * Nx * np.dtype(dtype).itemsize)))
+    z = bd.asarray(z)
+
+    for i in range(0, len(z), chunk_size):
+        z_chunk = z[i:i + chunk_size]
+        E_chunk = inverse_spectrum(c * bd.exp(1j * kz * z_chunk[:, None, None]).astype(dtype))
+        if intensity_only:
+            E_chunk = bd.real(E_chunk * bd.conjugate(E_chunk))
+
+        if output_file is not None:
+            stack[i:i + chunk_size] = E_chunk.get() if backend_name == 'cupy' else np.asarray(E_chunk)
+        elif backend_name == 'jax':
+            stack = stack.at[i:i + chunk_size].set(E_chunk)
+        else:
+            stack[i:i + chunk_size] = E_chunk
+
+    if output_file is not None:
+        stack.flush()
+
+    return stack
@@ -0,0 +1,100 @@
+import numpy as np
+from ..util.backend_functions import backend as bd
+from ..util.kernel_cache import transfer_function_cache, cache_key
+from ..util.fft_layout import get_layout, spectrum_fftfreq, forward_spectrum, inverse_spectrum
+from ..util.fft_backends import next_fast_len
+from ..util.precision import complex_dtype
+from .angular_spectrum_method import _angular_spectrum_kz
+
+"""
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+def band_limited_angular_spectrum_method(simulation, E, z, λ):
+    """
+    Compute the field in distance equal to z with the band-limited angular spectrum method.
+    The ouplut plane coordinates is the same than the input.
+
+    Unlike angular_spectrum_method, the field is zero padded to avoid the wrap-around of the light diffracted
+    outside the grid, so large propagation distances can be computed without oversizing the grid by hand.
+    The padding is the minimal one required for the given distance and wavelength (see get_band_limited_padding),
+    and the transfer function is band-limited to avoid the aliasing of its phase.
+
+    Reference:
+    K. Matsushima and T. Shimobaba, "Band-Limited Angular Spectrum Method for Numerical Simulation of Free-Space Propagation
+    in Far and Near Fields," Opt. Express 17, 19662-19673 (2009)
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    dtype = complex_dtype(E.dtype)
+    Nx, Ny = simulation.Nx, simulation.Ny
+    Nx_padded, Ny_padded = get_band_limited_padding(Nx, Ny, simulation.dx, simulation.dy, λ, z)
+
+    # the field is padded at the end of each axis. The circular convolution computed with the FFT then
+    # equals the linear convolution over the original grid, which is cropped back.
+    E = bd.pad(E, ((0, 0),) * (E.ndim - 2) + ((0, Ny_padded - Ny), (0, Nx_padded - Nx)))
+
+    c = forward_spectrum(E)
+    H = get_band_limited_transfer_function(Nx_padded, Ny_padded, simulation.dx, simulation.dy, λ, z, dtype = dtype)
+    E = inverse_spectrum(c * H)
+
+    return E[..., :Ny, :Nx]
+
+
+
+def get_band_limited_padding(Nx, Ny, dx, dy, λ, z):
+    """
+    Return the minimal padded grid size (Nx_padded, Ny_padded) required to propagate a Nx x Ny field a distance z
+    without wrap-around.
+
+    The light diffracted by the field spreads at most a distance w = z * tan(θ) beyond the grid, where sin(θ) = λ/(2*dx)
+    is the maximum angle represented by the sampling. The circular convolution equals the linear one over the original grid
+    if the padded extent is at least L + w, and the padding is never larger than 2*L (full linear convolution).
+    Each padded size is rounded up to a fast FFT length.
+    """
+
+    def padded_size(N, d):
+        L = N * d
+        sin_θ = min(λ / (2 * d), 1.)
+        if sin_θ < 1.:
+            w = abs(z) * sin_θ / np.sqrt(1 - sin_θ**2)
+        else:
+            w = L
+        w = min(w, L)
+        return max(next_fast_len(int(np.ceil((L + w) / d))), N)
+
+    return padded_size(Nx, dx), padded_size(Ny, dy)
+
+
+
+def get_band_limited_transfer_function(Nx, Ny, dx, dy, λ, z, layout = None, dtype = np.complex128):
+    """
+    Return the band-limited angular spectrum transfer function of a Nx x Ny (padded) grid, sampled in the FFT frequency grid.
+    The frequencies above the Matsushima limit u_limit = 1 / (λ * sqrt((2 * z / (N * d))**2 + 1)), where the phase of
+    the transfer function is undersampled, are removed.
+    The result is stored in the transfer function cache.
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    layout = get_layout(layout)
+
+    def build():
+        fx = spectrum_fftfreq(Nx, dx, layout)
+        fy = spectrum_fftfreq(Ny, dy, layout)
+
+        fx_limit = 1 / (λ * np.sqrt((2 * z / (Nx * dx))**2 + 1))
+        fy_limit = 1 / (λ * np.sqrt((2 * z / (Ny * dy))**2 + 1))
+
+        H = bd.exp(1j * _angular_spectrum_kz(Nx, Ny, dx, dy, λ, layout) * z)
+        band_limit = (bd.abs(fy)[:, None] < fy_limit) & (bd.abs(fx)[None, :] < fx_limit)
+        return bd.where(band_limit, H, 0).astype(dtype)
+
+    key = cache_key('band_limited_H', backend_name, layout, np.dtype(dtype).str, Nx, Ny, dx, dy, λ, z)
+    return transfer_function_cache.get(key, build)
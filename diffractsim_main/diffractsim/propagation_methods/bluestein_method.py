@@ -1,5 +1,6 @@
 from ..util.backend_functions import backend as bd
-from ..util.bluestein_FFT import bluestein_fft2, bluestein_fftfreq
+from ..util.bluestein_FFT import bluestein_fft, bluestein_fft2, bluestein_fftfreq
+from ..util.precision import match_precision
 
 """
 MPL 2.0 License 
@@ -28,28 +29,61 @@ def bluestein_method(simulation, E, z, λ, x_interval, y_interval):
     global bd
     from ..util.backend_functions import backend as bd
 
-    
-    E = bluestein_fft2(E * bd.exp(1j * 2*bd.pi/λ /(2*z) *(simulation.xx**2 + simulation.yy**2)), 
+
+    # the quadratic phases are separable, so they are evaluated along each axis and broadcasted
+    # instead of computing the complex exponential over the full grid. The phases are evaluated in double precision.
+    chirp_x = bd.exp(1j * 2*bd.pi/λ /(2*z) * simulation.x.astype(bd.float64)**2)
+    chirp_y = bd.exp(1j * 2*bd.pi/λ /(2*z) * simulation.y.astype(bd.float64)**2)
+
+    E = bluestein_fft2(E * match_precision(chirp_y[:, None] * chirp_x[None, :], E), 
                         x_interval[0] / (z*λ), x_interval[1] / (z*λ), 1/simulation.dx, 
                         y_interval[0] / (z*λ), y_interval[1] / (z*λ), 1/simulation.dy)
 
-    dfx = 1/(simulation.Nx*simulation.dx)
-    dfy = 1/(simulation.Ny*simulation.dy)
-
     fx_zfft = bluestein_fftfreq(x_interval[0]/ (z*λ),x_interval[1]/ (z*λ), simulation.Nx)
     fy_zfft = bluestein_fftfreq(y_interval[0]/ (z*λ),y_interval[1]/ (z*λ), simulation.Ny)
-    dfx_zfft = fx_zfft[1]-fx_zfft[0]
-    dfy_zfft = fy_zfft[1]-fy_zfft[0]
 
-    fxx, fyy = bd.meshgrid(fx_zfft, fy_zfft)
     x_shift = simulation.x[0]
     y_shift = simulation.y[0]
-    factor = (simulation.dx*simulation.dy * bd.exp(-1j*2*bd.pi*x_shift*fxx -1j*2*bd.pi*y_shift*fyy))
 
     x = fx_zfft*(z*λ)
     y = fy_zfft*(z*λ)
 
-    xx, yy = bd.meshgrid(x, y)
-    return x,y, E*factor * bd.exp(1j*bd.pi/(λ*z)  * (xx**2 + yy**2)  +   1j*2*bd.pi/λ * z ) / (1j*z*λ)
+    factor_x = bd.exp(-1j*2*bd.pi*x_shift*fx_zfft + 1j*bd.pi/(λ*z) * x**2)
+    factor_y = bd.exp(-1j*2*bd.pi*y_shift*fy_zfft + 1j*bd.pi/(λ*z) * y**2)
+    factor = simulation.dx*simulation.dy * bd.exp(1j*2*bd.pi/λ * z) / (1j*z*λ) * factor_y[:, None] * factor_x[None, :]
+
+    return x,y, E*match_precision(factor, E)
+
+
+
+def bluestein_method_1d(x, dx, E, z, λ, interval):
+    """
+    One dimensional factor of the Bluestein method, used to propagate separable fields E(x,y) = E_x(x) * E_y(y).
+    As the Fresnel kernel is separable, the 2D propagated field equals the product of the 1D propagations of each factor
+    multiplied by the constant exp(1j * 2*pi/λ * z) / (1j*z*λ), which isn't included here.
+
+    Parameters
+    ----------
+    x: 1D coordinates of the field factor E
+    dx: spacing of the coordinates (passed separately, as computing it from single precision coordinates isn't accurate enough)
+    E: 1D field factor
+    interval: A length-2 sequence [x1, x2] giving the outplut plane range
+
+    Returns
+    -------
+    x, E: the new coordinates and the propagated field factor
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    N = E.shape[-1]
+    x64 = x.astype(bd.float64)
+
+    E = bluestein_fft(E * match_precision(bd.exp(1j * 2*bd.pi/λ /(2*z) * x64**2), E), 
+                      axis = -1, f0 = interval[0] / (z*λ), f1 = interval[1] / (z*λ), fs = 1/dx, M = N)
 
+    fx_zfft = bluestein_fftfreq(interval[0]/ (z*λ), interval[1]/ (z*λ), N)
+    x_out = fx_zfft*(z*λ)
 
+    factor = dx * bd.exp(-1j*2*bd.pi*x64[0]*fx_zfft + 1j*bd.pi/(λ*z) * x_out**2)
+    return x_out, E*match_precision(factor, E)
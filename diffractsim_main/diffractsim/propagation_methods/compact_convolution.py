@@ -0,0 +1,150 @@
+import numpy as np
+from ..util.backend_functions import backend as bd
+from ..util.fft_backends import next_fast_len
+from ..util.precision import complex_dtype, match_precision
+from .propagator_selection import fft2_cost
+
+"""
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Convolution with point spread functions (PSF) whose support is much smaller than the grid.
+
+The support of the PSF is detected with an energy threshold and the PSF is cropped to it. The convolution is then computed
+with overlap-save blocks with small FFTs, or directly in the spatial domain for very small kernels, depending on a cost model.
+The field is treated as periodic, so the result is the same circular convolution computed by PSF_convolution with full-grid FFTs.
+"""
+
+
+def get_PSF_support(PSF, tolerance = 1e-12):
+    """
+    Return the half-widths (hy, hx) of the smallest rectangle centered at the center of the grid (Ny//2, Nx//2) which
+    contains all the energy of the PSF except a fraction tolerance in each direction.
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    energy = bd.abs(PSF)**2
+    total = float(bd.sum(energy))
+    if total == 0:
+        return 0, 0
+
+    def half_width(profile):
+        N = len(profile)
+        c = N//2
+        cumulative = np.concatenate(([0.], np.cumsum(np.asarray(profile, dtype = np.float64))))
+        # energy contained in the window [c - h, c + h] for each half-width h
+        h = np.arange(N//2 + 1)
+        contained = cumulative[np.minimum(c + h + 1, N)] - cumulative[np.maximum(c - h, 0)]
+        return int(np.argmax(contained >= (1 - tolerance) * total))
+
+    profile_x = bd.sum(energy, axis = 0)
+    profile_y = bd.sum(energy, axis = 1)
+    if hasattr(profile_x, 'get'):
+        profile_x, profile_y = profile_x.get(), profile_y.get()
+    return half_width(profile_y), half_width(profile_x)
+
+
+def direct_convolution(E, K):
+    """circular convolution of E with the small kernel K (with odd dimensions, centered at its central sample) computed in the spatial domain"""
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    ky, kx = K.shape
+    hy, hx = ky//2, kx//2
+    Ny, Nx = E.shape
+    E_padded = bd.pad(E, ((hy, hy), (hx, hx)), mode = 'wrap')
+
+    out = bd.zeros(E.shape, dtype = bd.result_type(E, K))
+    for a in range(-hy, hy + 1):
+        for b in range(-hx, hx + 1):
+            out = out + K[a + hy, b + hx] * E_padded[hy - a: hy - a + Ny, hx - b: hx - b + Nx]
+    return out
+
+
+def overlap_save_convolution(E, K, block_shape):
+    """
+    Circular convolution of E with the small kernel K (with odd dimensions, centered at its central sample),
+    computed with overlap-save blocks of shape block_shape. Each row of blocks is transformed with a single batched FFT.
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    ky, kx = K.shape
+    hy, hx = ky//2, kx//2
+    By, Bx = block_shape
+    Ny, Nx = E.shape
+
+    # number of valid output samples of each block
+    Sy, Sx = By - ky + 1, Bx - kx + 1
+    nby, nbx = -(-Ny // Sy), -(-Nx // Sx)
+
+    # the field is periodically extended, so the blocks at the edges wrap around the grid like the full-grid FFT convolution
+    E_padded = bd.pad(E, ((hy, nby * Sy + ky - 1 - Ny - hy), (hx, nbx * Sx + kx - 1 - Nx - hx)), mode = 'wrap')
+
+    K_f = bd.fft.fft2(K, s = (By, Bx))
+    columns = (bd.arange(nbx) * Sx)[:, None] + bd.arange(Bx)[None, :]
+
+    rows = []
+    for i in range(nby):
+        # (nbx, By, Bx) blocks of the i-th row of blocks
+        blocks = bd.transpose(E_padded[i * Sy: i * Sy + By][:, columns], (1, 0, 2))
+        blocks = bd.fft.ifft2(bd.fft.fft2(blocks) * K_f)[:, ky - 1:, kx - 1:]
+        rows.append(bd.reshape(bd.transpose(blocks, (1, 0, 2)), (Sy, nbx * Sx)))
+
+    return bd.concatenate(rows, axis = 0)[:Ny, :Nx]
+
+
+def select_compact_convolution(Nx, Ny, kx, ky):
+    """
+    Estimate the cost of the convolution of a Nx x Ny field with a kx x ky kernel with full-grid FFTs, overlap-save blocks and
+    direct convolution. Return the cheapest method ('fft', 'overlap_save' or 'direct') and the block shape used by overlap-save.
+    """
+
+    # full-grid FFT convolution: FFT of the field and of the PSF, and inverse FFT
+    costs = {'fft': 3 * fft2_cost(Nx, Ny) + 6 * Nx * Ny}
+    costs['direct'] = 8. * Nx * Ny * kx * ky
+
+    best_block, best_cost = None, np.inf
+    for m in (2, 4, 8, 16):
+        By = min(next_fast_len(m * ky), next_fast_len(Ny + ky - 1))
+        Bx = min(next_fast_len(m * kx), next_fast_len(Nx + kx - 1))
+        blocks = -(-Ny // (By - ky + 1)) * -(-Nx // (Bx - kx + 1))
+        cost = fft2_cost(Bx, By) + blocks * (2 * fft2_cost(Bx, By) + 6 * Bx * By)
+        if cost < best_cost:
+            best_block, best_cost = (By, Bx), cost
+    costs['overlap_save'] = best_cost
+
+    return min(costs, key = costs.get), best_block
+
+
+def compact_convolution(simulation, E, λ, PSF, tolerance = 1e-12):
+    """
+    Convolve the field with the coherent PSF sampled in spatial simulation coordinates, as PSF_convolution, exploiting its compact support.
+    The PSF is cropped to the region containing all its energy except a fraction tolerance (see get_PSF_support),
+    and the convolution is computed with overlap-save blocks, direct convolution or full-grid FFTs, whichever is estimated cheapest.
+
+    With odd grid dimensions, PSF_convolution centers the PSF with a half sample shift, so the full-grid FFTs are always used.
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+    from .PSF_convolution import PSF_convolution
+
+    Ny, Nx = E.shape
+    if Nx % 2 == 1 or Ny % 2 == 1:
+        return PSF_convolution(simulation, E, λ, PSF)
+
+    hy, hx = get_PSF_support(PSF, tolerance)
+    ky, kx = 2 * hy + 1, 2 * hx + 1
+    method, block_shape = select_compact_convolution(Nx, Ny, kx, ky)
+    if ky > Ny or kx > Nx or method == 'fft':
+        return PSF_convolution(simulation, E, λ, PSF)
+
+    dtype = complex_dtype(E.dtype)
+    K = match_precision(simulation.dx * simulation.dy * PSF[Ny//2 - hy: Ny//2 + hy + 1, Nx//2 - hx: Nx//2 + hx + 1], dtype)
+
+    if method == 'direct':
+        return direct_convolution(E, K).astype(dtype)
+    return overlap_save_convolution(E, K, block_shape).astype(dtype)
@@ -0,0 +1,145 @@
+import numpy as np
+from ..util.backend_functions import backend as bd
+
+"""
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Out-of-core propagation of fields stored in a memory-mapped file (numpy.memmap), for grids which don't fit in memory.
+
+The 2D FFT is split in row and column passes over chunks whose size is bounded by a memory budget:
+
+- pass 1: FFT of each chunk of rows (after multiplying them by an optional input chirp)
+- pass 2: FFT of each chunk of columns, multiplication by the transfer function evaluated for the chunk, and inverse FFT
+- pass 3: inverse FFT of each chunk of rows (followed by an optional output chirp)
+
+The field is transformed in place, so the disk space required is only the one of the field.
+Each chunk is moved to the current backend for the computations, so the GPU backends can also be used.
+"""
+
+# number of arrays of the size of a chunk allocated simultaneously during the passes (chunk, FFT output, frequencies, kernel...)
+CHUNK_ARRAYS = 6
+
+
+def chunk_length(N, line_size, itemsize, max_bytes):
+    """return the number of lines of line_size elements that can be processed at once within the memory budget max_bytes"""
+    return int(min(N, max(1, max_bytes // (CHUNK_ARRAYS * line_size * itemsize))))
+
+
+def _to_backend(a):
+    return bd.asarray(a)
+
+
+def _to_numpy(a):
+    from ..util.backend_functions import backend_name
+    if backend_name == 'cupy':
+        return a.get()
+    return np.asarray(a)
+
+
+def out_of_core_fft_convolution(E, transfer_function, max_bytes, input_chirp = None, output_chirp = None):
+    """
+    Multiply the 2D spectrum of the memory-mapped field E (Ny x Nx) by a transfer function with three chunked passes.
+    E is overwritten with the result.
+
+    Parameters
+    ----------
+    transfer_function: function transfer_function(columns) returning the transfer function, sampled in unshifted FFT order,
+                       at the columns of the slice columns (an array of shape (Ny, number of columns))
+    max_bytes: memory budget in bytes of the temporary arrays of each chunk
+    input_chirp: optional function input_chirp(rows) returning the factor applied to E[rows] before the forward FFT
+    output_chirp: optional function output_chirp(rows) returning the factor applied to E[rows] after the inverse FFT
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    Ny, Nx = E.shape
+    itemsize = np.dtype(E.dtype).itemsize
+
+    # pass 1: FFT along the rows
+    rows_per_chunk = chunk_length(Ny, Nx, itemsize, max_bytes)
+    for i in range(0, Ny, rows_per_chunk):
+        rows = slice(i, min(i + rows_per_chunk, Ny))
+        E_chunk = _to_backend(E[rows])
+        if input_chirp is not None:
+            E_chunk = E_chunk * input_chirp(rows)
+        E[rows] = _to_numpy(bd.fft.fft(E_chunk, axis = 1))
+
+    # pass 2: FFT along the columns, multiplication by the transfer function and inverse FFT along the columns
+    columns_per_chunk = chunk_length(Nx, Ny, itemsize, max_bytes)
+    for j in range(0, Nx, columns_per_chunk):
+        columns = slice(j, min(j + columns_per_chunk, Nx))
+        E_chunk = bd.fft.fft(_to_backend(E[:, columns]), axis = 0)
+        E_chunk = E_chunk * transfer_function(columns).astype(E_chunk.dtype)
+        E[:, columns] = _to_numpy(bd.fft.ifft(E_chunk, axis = 0))
+
+    # pass 3: inverse FFT along the rows
+    for i in range(0, Ny, rows_per_chunk):
+        rows = slice(i, min(i + rows_per_chunk, Ny))
+        E_chunk = bd.fft.ifft(_to_backend(E[rows]), axis = 1)
+        if output_chirp is not None:
+            E_chunk = E_chunk * output_chirp(rows)
+        E[rows] = _to_numpy(E_chunk)
+
+    if isinstance(E, np.memmap):
+        E.flush()
+    return E
+
+
+
+def out_of_core_angular_spectrum_method(simulation, E, z, λ, max_bytes):
+    """
+    Compute in place the field stored in the memory-mapped array E in distance equal to z with the angular spectrum method,
+    using chunks bounded by the memory budget max_bytes. See angular_spectrum_method.
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    Nx, Ny = simulation.Nx, simulation.Ny
+    fx = bd.fft.fftfreq(Nx, d = simulation.dx)
+    fy = bd.fft.fftfreq(Ny, d = simulation.dy)[:, None]
+
+    def transfer_function(columns):
+        argument = (2 * bd.pi)**2 * ((1. / λ) ** 2 - fx[None, columns] ** 2 - fy ** 2)
+
+        #Calculate the propagating and the evanescent (complex) modes
+        tmp = bd.sqrt(bd.abs(argument))
+        kz = bd.where(argument >= 0, tmp, 1j*tmp)
+        return bd.exp(1j * kz * z)
+
+    return out_of_core_fft_convolution(E, transfer_function, max_bytes)
+
+
+
+def out_of_core_two_steps_fresnel_method(simulation, E, z, λ, scale_factor, max_bytes):
+    """
+    Compute in place the field stored in the memory-mapped array E in distance equal to z with the two step Fresnel propagator,
+    using chunks bounded by the memory budget max_bytes. See two_steps_fresnel_method.
+    Return the new coordinates x and y.
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    Nx, Ny = simulation.Nx, simulation.Ny
+    L1 = simulation.extent_x
+    L2 = simulation.extent_x*scale_factor
+
+    # the coordinates are evaluated in double precision to compute the phases
+    x = bd.asarray(simulation.x, dtype = bd.float64)[None, :]
+    y = bd.asarray(simulation.y, dtype = bd.float64)[:, None]
+    fx = bd.fft.fftfreq(Nx, d = simulation.dx)
+    fy = bd.fft.fftfreq(Ny, d = simulation.dy)[:, None]
+
+    def input_chirp(rows):
+        return bd.exp(1j * np.pi/(z * λ) * (L1-L2)/L1 * (x**2 + y[rows]**2)).astype(E.dtype)
+
+    def transfer_function(columns):
+        return bd.exp(- 1j * np.pi * λ * z * L1/L2 * (fx[None, columns]**2 + fy**2))
+
+    def output_chirp(rows):
+        return (L1/L2 * bd.exp(1j * 2*np.pi/λ * z   - 1j * np.pi/(z * λ)* (L1-L2)/L2 * ((x*scale_factor)**2 + (y[rows]*scale_factor)**2))).astype(E.dtype)
+
+    out_of_core_fft_convolution(E, transfer_function, max_bytes, input_chirp = input_chirp, output_chirp = output_chirp)
+    return simulation.x*scale_factor,  simulation.y*scale_factor
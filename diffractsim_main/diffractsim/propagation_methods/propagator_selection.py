@@ -0,0 +1,122 @@
+import numpy as np
+import logging
+from ..util.fft_backends import next_fast_len
+from .band_limited_angular_spectrum_method import get_band_limited_padding
+
+"""
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def fft_cost(N, batch = 1):
+    """estimated number of floating point operations of batch complex FFTs of length N"""
+    return 5. * batch * N * np.log2(max(N, 2))
+
+
+def fft2_cost(Nx, Ny):
+    return fft_cost(Nx, Ny) + fft_cost(Ny, Nx)
+
+
+def select_propagator(Nx, Ny, dx, dy, λ, z, output_window = None):
+    """
+    Choose the cheapest propagation method of MonochromaticField which is valid for the given sampling, wavelength and distance.
+
+    Parameters
+    ----------
+    output_window: None to compute the field in the same grid than the input, or a sequence [x_interval, y_interval]
+                   with x_interval = [x1, x2] and y_interval = [y1, y2] giving the output plane range, sampled with Nx x Ny points.
+
+    The criteria used are:
+
+    - Sampling of the angular spectrum transfer function: its phase is aliased for z > z_c = N*d**2/λ.
+      Beyond this distance the light also wraps around the grid, so the band-limited angular spectrum method is required.
+    - Sampling of the Fresnel chirps: the input chirp of the Bluestein method exp(iπ r²/(λz)) is aliased for z < z_c,
+      and the two-step Fresnel method with scale factor s requires |1 - s| * z_c <= z <= s * z_c.
+    - Fresnel approximation validity: z**3 >= π/(4λ) * r_max**4, where r_max is the maximum distance between
+      a point of the input grid and a point of the output window.
+
+    Returns
+    -------
+    method: name of the selected method: 'propagate', 'band_limited', 'scale_propagate' or 'zoom_propagate'
+    kwargs: dictionary with the keyword arguments required by the method
+    reason: string explaining the choice
+    """
+
+    Lx, Ly = Nx * dx, Ny * dy
+    z = abs(z)
+    z_c = min(Nx * dx**2, Ny * dy**2) / λ
+
+    if output_window is None:
+        x_interval = [-(Nx//2) * dx, (Nx - 1 - Nx//2) * dx]
+        y_interval = [-(Ny//2) * dy, (Ny - 1 - Ny//2) * dy]
+    else:
+        x_interval, y_interval = output_window
+
+    # maximum distance between the input grid and the output window
+    r_max = np.hypot(max(abs(x_interval[1] + Lx/2), abs(x_interval[0] - Lx/2)),
+                     max(abs(y_interval[1] + Ly/2), abs(y_interval[0] - Ly/2)))
+    fresnel_valid = z**3 >= np.pi / (4 * λ) * r_max**4
+
+    # scale_propagate and scaled angular spectrum outputs are centered grids with the same number of points
+    scale_factor_x = (x_interval[1] - x_interval[0]) / ((Nx - 1) * dx)
+    scale_factor_y = (y_interval[1] - y_interval[0]) / ((Ny - 1) * dy)
+    scalable = (np.isclose(scale_factor_x, scale_factor_y, rtol = 1e-6)
+                and np.isclose(x_interval[0], -(Nx//2) * dx * scale_factor_x, rtol = 1e-6, atol = 1e-6 * dx * scale_factor_x)
+                and np.isclose(y_interval[0], -(Ny//2) * dy * scale_factor_y, rtol = 1e-6, atol = 1e-6 * dy * scale_factor_y))
+    scale_factor = float(scale_factor_x)
+
+    fresnel_reason = "Fresnel approximation is valid" if fresnel_valid else "Fresnel approximation isn't valid (z³ < π r_max⁴ / 4λ)"
+
+    # candidates: (method, kwargs, estimated cost, is valid, reason).
+    # They are sorted by accuracy, so in case of equal cost the more accurate method is chosen.
+    candidates = []
+
+    if scalable and np.isclose(scale_factor, 1, rtol = 1e-6):
+        candidates.append(('propagate', {}, 2 * fft2_cost(Nx, Ny), z <= z_c,
+                          f"angular spectrum transfer function is well sampled (z <= z_c = {z_c:.4g} m)" if z <= z_c
+                          else f"angular spectrum transfer function is undersampled (z > z_c = {z_c:.4g} m)"))
+
+        Nx_padded, Ny_padded = get_band_limited_padding(Nx, Ny, dx, dy, λ, z)
+        candidates.append(('band_limited', {}, 2 * fft2_cost(Nx_padded, Ny_padded), True,
+                          f"band-limited angular spectrum is valid for any distance (padded grid {Nx_padded} x {Ny_padded})"))
+
+    elif scalable:
+        # angular spectrum followed by a scaled Fourier transform
+        candidates.append(('propagate', {'scale_factor': scale_factor}, 3 * fft2_cost(Nx, Ny), z <= z_c,
+                          f"angular spectrum transfer function is well sampled (z <= z_c = {z_c:.4g} m)" if z <= z_c
+                          else f"angular spectrum transfer function is undersampled (z > z_c = {z_c:.4g} m)"))
+
+    if scalable:
+        # the first chirp of the two-step propagator, exp(iπ (1 - scale_factor) r²/(λz)), is well sampled for z >= |1 - scale_factor| * z_c,
+        # and its Fresnel transfer function exp(-iπ λ z f² / scale_factor) for z <= scale_factor * z_c
+        chirp_sampled = abs(1 - scale_factor) * z_c <= z <= scale_factor * z_c
+        candidates.append(('scale_propagate', {'scale_factor': scale_factor}, 2 * fft2_cost(Nx, Ny), fresnel_valid and chirp_sampled,
+                          fresnel_reason + (" and the two-step Fresnel chirps are well sampled" if chirp_sampled
+                                            else " but the two-step Fresnel chirps are undersampled")))
+
+    chirpz_cost = 2 * (fft_cost(next_fast_len(2 * Ny - 1), Nx) + fft_cost(next_fast_len(2 * Nx - 1), Ny))
+    candidates.append(('zoom_propagate', {'x_interval': list(x_interval), 'y_interval': list(y_interval)}, chirpz_cost,
+                       fresnel_valid and z >= z_c,
+                       fresnel_reason + (f" and the Fresnel chirp is well sampled (z >= z_c = {z_c:.4g} m)" if z >= z_c
+                                         else f" but the Fresnel chirp is undersampled (z < z_c = {z_c:.4g} m)")))
+
+    for method, kwargs, cost, valid, reason in candidates:
+        logger.debug(f"{method}: estimated cost {cost:.3g} flops, {'valid' if valid else 'not valid'}: {reason}")
+
+    valid_candidates = [c for c in candidates if c[3]]
+    if len(valid_candidates) > 0:
+        method, kwargs, cost, valid, reason = min(valid_candidates, key = lambda c: c[2])
+        reason = f"{method} selected (estimated cost {cost:.3g} flops): {reason}"
+        logger.info(reason)
+    else:
+        # no method satisfies all the criteria. Use the one which doesn't rely on the Fresnel approximation if available
+        method, kwargs, cost, valid, reason = candidates[0]
+        reason = f"{method} selected, but no method satisfies the validity criteria for this sampling and distance: {reason}"
+        logger.warning(reason)
+
+    return method, kwargs, reason
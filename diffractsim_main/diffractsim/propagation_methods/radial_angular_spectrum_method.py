@@ -0,0 +1,54 @@
+import numpy as np
+from ..util.backend_functions import backend as bd
+from ..util.hankel_transform import qdht, iqdht, hankel_sampling
+from ..util.kernel_cache import transfer_function_cache, cache_key
+from ..util.precision import complex_dtype
+
+"""
+MPL 2.0 License 
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+def radial_angular_spectrum_method(simulation, E, z, λ):
+    """
+    Compute the rotationally symmetric field E(r) in distance equal to z with the angular spectrum method. 
+    The angular spectrum is computed with the quasi-discrete Hankel transform, which is the 2D Fourier transform of a radial function,
+    so each propagation costs two N x N matrix products on the 1D radial grid instead of two 2D FFTs.
+    The ouplut plane coordinates is the same than the input.
+
+    Reference:
+    M. Guizar-Sicairos and J. C. Gutiérrez-Vega, "Computation of quasi-discrete Hankel transforms of integer order for propagating optical
+    wave fields," J. Opt. Soc. Am. A 21, 53-58 (2004)
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    c = qdht(E, simulation.R)
+    H = get_radial_angular_spectrum_transfer_function(simulation.N, simulation.R, λ, z, dtype = complex_dtype(E.dtype))
+    return iqdht(c * H, simulation.R)
+
+
+def get_radial_angular_spectrum_transfer_function(N, R, λ, z, dtype = np.complex128):
+    """
+    Return the angular spectrum transfer function exp(1j * kz * z) sampled at the N frequencies of the QDHT of a field with maximum radius R.
+    The phase kz * z is always computed in double precision and then casted to dtype.
+    The result is stored in the transfer function cache.
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    def build():
+        r, ν = hankel_sampling(N, R)
+        argument = (2 * bd.pi)**2 * ((1. / λ) ** 2 - ν ** 2)
+
+        #Calculate the propagating and the evanescent (complex) modes
+        tmp = bd.sqrt(bd.abs(argument))
+        kz = bd.where(argument >= 0, tmp, 1j*tmp)
+        return bd.exp(1j * kz * z).astype(dtype)
+
+    key = cache_key('radial_angular_spectrum_H', backend_name, np.dtype(dtype).str, N, R, λ, z)
+    return transfer_function_cache.get(key, build)
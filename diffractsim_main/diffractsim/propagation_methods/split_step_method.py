@@ -0,0 +1,79 @@
+import numpy as np
+from ..util.backend_functions import backend as bd
+from .angular_spectrum_method import get_angular_spectrum_transfer_function
+from ..util.precision import complex_dtype, match_precision
+from ..util.fft_backends import ScipyFFT, PyFFTW_FFT
+
+"""
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+
+def split_step_method(simulation, E, phase_screens, z, λ, aperture = None):
+    """
+    Propagate the field through a stack of thin phase screens separated by free space (multi-layer split-step method).
+    For each layer, the field is multiplied by the transmittance exp(1j * phase_screen) (and by the aperture if given)
+    and then propagated a distance z with the angular spectrum method.
+
+    The transfer functions are taken from the transfer function cache, so layers with equal spacings share the same kernel.
+    They are evaluated in the unshifted FFT order, so no fftshift is required between the layers.
+    Except with the jax backend, the transmittance is computed in a single preallocated buffer and multiplied in place into the field.
+    With the CPU-MT and FFTW backends, the FFTs also overwrite the buffer of the field. With the other backends, each FFT allocates its output.
+
+    Parameters
+    ----------
+    phase_screens: sequence of real arrays (or a (number of layers, Ny, Nx) array) with the phase in radians imparted by each layer
+    z: distance propagated after each phase screen. A single number for equally spaced layers, or a sequence with one distance per layer
+    aperture: optional (Ny, Nx) real array with the amplitude transmittance shared by all the layers (for example the finite size of the masks)
+    """
+    global bd
+    global backend_name
+    from ..util.backend_functions import backend as bd
+    from ..util.backend_functions import backend_name
+
+    Nx, Ny = simulation.Nx, simulation.Ny
+    dtype = complex_dtype(E.dtype)
+
+    if np.ndim(z) == 0:
+        z = [z] * len(phase_screens)
+    if len(z) != len(phase_screens):
+        raise ValueError("z must be a single distance or a sequence with one distance per phase screen")
+
+    if aperture is not None:
+        aperture = match_precision(bd.asarray(aperture), E.real)
+
+    if backend_name == 'jax':
+        for phase, dz in zip(phase_screens, z):
+            t = bd.exp(1j * bd.asarray(phase)).astype(dtype)
+            if aperture is not None:
+                t = t * aperture
+            H = get_angular_spectrum_transfer_function(Nx, Ny, simulation.dx, simulation.dy, λ, dz, layout = 'native', dtype = dtype)
+            E = bd.fft.ifft2(bd.fft.fft2(E * t) * H)
+        return E
+
+    # only the FFT providers of the CPU-MT and FFTW backends support overwrite_x (see fft_backends)
+    overwrite = isinstance(bd.fft, (ScipyFFT, PyFFTW_FFT))
+
+    E = bd.array(E, dtype = dtype)
+    t = bd.empty_like(E)
+    for phase, dz in zip(phase_screens, z):
+        bd.multiply(bd.asarray(phase), 1j, out = t, casting = 'same_kind')
+        bd.exp(t, out = t)
+        if aperture is not None:
+            bd.multiply(t, aperture, out = t)
+        bd.multiply(E, t, out = E)
+
+        H = get_angular_spectrum_transfer_function(Nx, Ny, simulation.dx, simulation.dy, λ, dz, layout = 'native', dtype = dtype)
+        if overwrite:
+            E = bd.fft.fft2(E, overwrite_x = True)
+            bd.multiply(E, H, out = E)
+            E = bd.fft.ifft2(E, overwrite_x = True)
+        else:
+            E = bd.fft.fft2(E)
+            bd.multiply(E, H, out = E)
+            E = bd.fft.ifft2(E)
+
+    return E
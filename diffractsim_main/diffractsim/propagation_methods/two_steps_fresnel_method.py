@@ -1,5 +1,7 @@
 import numpy as np
 from ..util.backend_functions import backend as bd
+from ..util.fft_layout import spectrum_fftfreq, forward_spectrum, inverse_spectrum
+from ..util.precision import match_precision
 
 """
 MPL 2.0 License 
@@ -27,13 +29,49 @@ def two_steps_fresnel_method(simulation, E, z, λ, scale_factor):
     L1 = simulation.extent_x
     L2 = simulation.extent_x*scale_factor
 
+    # the chirps phases are large, so they are evaluated in double precision and then casted to the precision of the field
+    x = simulation.x.astype(bd.float64)
+    y = simulation.y.astype(bd.float64)
+    r2 = x[None, :]**2 + y[:, None]**2
 
-    fft_E = bd.fft.fftshift(bd.fft.fft2(E * bd.exp(1j * np.pi/(z * λ) * (L1-L2)/L1 * (simulation.xx**2 + simulation.yy**2) )  ))
-    fx = bd.fft.fftshift(bd.fft.fftfreq(simulation.Nx, d = simulation.dx))
-    fy = bd.fft.fftshift(bd.fft.fftfreq(simulation.Ny, d = simulation.dy))
-    fx, fy = bd.meshgrid(fx, fy)
+    fft_E = forward_spectrum(E * match_precision(bd.exp(1j * np.pi/(z * λ) * (L1-L2)/L1 * r2), E))
+    # the frequencies are kept in double precision, only the exponential is casted to the precision of the field
+    fx = spectrum_fftfreq(simulation.Nx, float(simulation.dx)).astype(bd.float64)
+    fy = spectrum_fftfreq(simulation.Ny, float(simulation.dy)).astype(bd.float64)
 
-    E = bd.fft.ifft2(bd.fft.ifftshift( bd.exp(- 1j * np.pi * λ * z * L1/L2 * (fx**2 + fy**2))  *  fft_E) )
+    E = inverse_spectrum( match_precision(bd.exp(- 1j * np.pi * λ * z * L1/L2 * (fx[None, :]**2 + fy[:, None]**2)), E)  *  fft_E)
 
-    E = L1/L2 * bd.exp(1j * 2*np.pi/λ * z   - 1j * np.pi/(z * λ)* (L1-L2)/L2 * ((simulation.xx*scale_factor)**2 + (simulation.yy*scale_factor)**2)) * E
+    E = match_precision(L1/L2 * bd.exp(1j * 2*np.pi/λ * z   - 1j * np.pi/(z * λ)* (L1-L2)/L2 * scale_factor**2 * r2), E) * E
     return simulation.x*scale_factor,  simulation.y*scale_factor, E
+
+
+
+def two_steps_fresnel_method_1d(x, dx, E, z, λ, scale_factor):
+    """
+    One dimensional factor of the two step Fresnel propagator, used to propagate separable fields E(x,y) = E_x(x) * E_y(y).
+    As the Fresnel kernel is separable, the 2D propagated field equals the product of the 1D propagations of each factor
+    multiplied by the constant exp(1j * 2*pi/λ * z) / scale_factor, which isn't included here.
+
+    Parameters
+    ----------
+    x: 1D coordinates of the field factor E
+    dx: spacing of the coordinates (passed separately, as computing it from single precision coordinates isn't accurate enough)
+    E: 1D field factor
+
+    Returns
+    -------
+    x, E: the new coordinates (x * scale_factor) and the propagated field factor
+    """
+    global bd
+    from ..util.backend_functions import backend as bd
+
+    N = E.shape[-1]
+    x64 = x.astype(bd.float64)
+
+    fft_E = bd.fft.fft(E * match_precision(bd.exp(1j * np.pi/(z * λ) * (1 - scale_factor) * x64**2), E))
+    fx = bd.fft.fftfreq(N, d = dx)
+
+    E = bd.fft.ifft( match_precision(bd.exp(- 1j * np.pi * λ * z / scale_factor * fx**2), E)  *  fft_E)
+
+    E = match_precision(bd.exp(- 1j * np.pi/(z * λ)* (1 - scale_factor) / scale_factor * (x64*scale_factor)**2), E) * E
+    return x*scale_factor, E
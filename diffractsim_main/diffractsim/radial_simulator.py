@@ -0,0 +1,107 @@
+import numpy as np
+from .util.constants import *
+from .monochromatic_simulator import MonochromaticField
+from .propagation_methods import radial_angular_spectrum_method
+from .light_sources.light_source import LightSource
+from .util.hankel_transform import hankel_sampling
+from .util.backend_functions import backend as bd
+from .util.precision import complex_dtype, real_dtype, match_precision
+
+
+"""
+MPL 2.0 Clause License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+
+class RadialField:
+    def __init__(self,  wavelength, radius, N, intensity = 0.1 * W / (m**2), dtype = np.complex128):
+        """
+        Initializes a rotationally symmetric field E(r), sampled at N radii between 0 and radius.
+
+        The field is propagated with the quasi-discrete Hankel transform (QDHT) on the 1D radial grid, so each propagation costs
+        O(N**2) operations instead of the O(N**2 log N) of the 2D FFTs used by MonochromaticField with a N x N grid.
+        Only rotationally symmetric elements can be added: CircularAperture (centered), Lens (without aberration), Axicon, FZP,
+        BinaryFZP, GaussianBeam and PlaneWave. Arbitrary radial profiles (for example the phase designed with RotationalPhaseDesign)
+        can be set directly: F.E = F.E * np.exp(1j * RPD.Φ_fun(F.r))
+
+        The field is only rendered to a 2D grid on request, with get_monochromatic_field.
+
+        Parameters
+        ----------
+        wavelength: wavelength of the field
+        radius: maximum radius of the grid. The field is assumed to be zero beyond it
+        N: number of radial samples. The sample radii are not exactly equally spaced (see util.hankel_transform)
+        intensity: intensity of the field
+        dtype: precision of the simulation (np.complex128 or np.complex64)
+        """
+        global bd
+        from .util.backend_functions import backend as bd
+
+        self.R = radius
+        self.N = N
+
+        self.dtype = complex_dtype(dtype)
+        self.real_dtype = real_dtype(dtype)
+
+        r, ν = hankel_sampling(N, radius)
+        self.r = r.astype(self.real_dtype)
+
+        self.E = bd.ones(N, dtype = self.dtype) * intensity**0.5
+        self.λ = wavelength
+        self.z = 0
+
+
+    def add(self, optical_element):
+
+        if isinstance(optical_element, LightSource):
+            E = optical_element.get_radial_E(self.E, self.r, self.λ)
+            if E is None:
+                raise ValueError(f"{type(optical_element).__name__} isn't rotationally symmetric. Use MonochromaticField instead.")
+            self.E = match_precision(E, self.dtype)
+        else:
+            t = optical_element.get_radial_transmittance(self.r, self.λ)
+            if t is None:
+                raise ValueError(f"{type(optical_element).__name__} isn't rotationally symmetric. Use MonochromaticField instead.")
+            self.E = self.E * match_precision(t, self.dtype)
+
+
+    def propagate(self, z):
+        """
+        Compute the field in distance equal to z with the angular spectrum method, using the quasi-discrete Hankel transform.
+        The transfer function is stored in the transfer function cache.
+        """
+
+        self.z += z
+        self.E = radial_angular_spectrum_method(self, self.E, z, self.λ)
+
+
+    def get_field(self):
+        """get the radial profile of the field at the current distance"""
+
+        return self.E
+
+
+    def get_intensity(self):
+        """compute the radial profile of the field intensity at the current distance"""
+
+        return bd.real(self.E * bd.conjugate(self.E))
+
+
+    def get_monochromatic_field(self, extent_x, extent_y, Nx, Ny):
+        """
+        Render the field in a 2D grid, returning a MonochromaticField with the given extent and dimensions
+        whose field is interpolated from the radial profile. It can be used to visualize the field
+        (for example with get_colors and plot_colors) or to continue the simulation with non symmetric elements.
+        """
+
+        F = MonochromaticField(self.λ, extent_x, extent_y, Nx, Ny, dtype = self.dtype)
+        F.z = self.z
+
+        rr = bd.sqrt(F.x[None, :].astype(bd.float64)**2 + F.y[:, None].astype(bd.float64)**2)
+        r = self.r.astype(bd.float64)
+        E = bd.interp(rr, r, bd.real(self.E), right = 0) + 1j * bd.interp(rr, r, bd.imag(self.E), right = 0)
+        F.E = match_precision(E, self.dtype)
+        return F
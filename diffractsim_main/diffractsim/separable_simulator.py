@@ -0,0 +1,143 @@
+import numpy as np
+from .util.constants import *
+from .monochromatic_simulator import MonochromaticField
+from .propagation_methods import two_steps_fresnel_method_1d, bluestein_method_1d
+from .light_sources.light_source import LightSource
+from .util.backend_functions import backend as bd
+from .util.precision import match_precision
+
+
+"""
+MPL 2.0 Clause License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+"""
+
+
+class SeparableField(MonochromaticField):
+    def __init__(self,  wavelength, extent_x, extent_y, Nx, Ny, intensity = 0.1 * W / (m**2), dtype = np.complex128):
+        """
+        Initializes a field whose cross-section profile is separable: E(x,y) = E_x(x) * E_y(y).
+
+        While only separable elements are added (RectangularSlit, BinaryGrating, PhaseGrating, Lens without radius
+        and aberration, GaussianBeam and PlaneWave), the field is stored as the two 1D factors E_x and E_y and propagated
+        with scale_propagate and zoom_propagate using two 1D transforms, requiring O(N) memory and O(N log N) time.
+
+        When a non separable element is added or a non separable propagation method is used (for example propagate,
+        whose angular spectrum kernel isn't separable), the field is automatically converted to a 2D field and
+        all the methods of MonochromaticField are used.
+
+        The parameters are the same than in MonochromaticField.
+        """
+        global bd
+        from .util.backend_functions import backend as bd
+
+        # the 2D field isn't allocated: only the grid and the simulation state are initialized
+        super()._init_grid(wavelength, extent_x, extent_y, Nx, Ny, dtype = dtype)
+
+        self.E_x = bd.ones(Nx, dtype = self.dtype) * intensity**0.5
+        self.E_y = bd.ones(Ny, dtype = self.dtype)
+        self._E = None
+
+
+    @property
+    def separable(self):
+        """True while the field is stored as its 1D factors E_x and E_y"""
+        return self._E is None
+
+    @property
+    def E(self):
+        if self.separable:
+            return self.E_y[:, None] * self.E_x[None, :]
+        return self._E
+
+    @E.setter
+    def E(self, E):
+        # assigning a 2D field disables the separable representation
+        self._E = E
+        self.E_x = None
+        self.E_y = None
+
+    def _update_coordinates(self, x, y, dx, dy):
+        self.x = match_precision(x, self.real_dtype)
+        self.y = match_precision(y, self.real_dtype)
+        self.dx = dx
+        self.dy = dy
+        self.extent_x = self.Nx*self.dx
+        self.extent_y = self.Ny*self.dy
+
+
+    def add(self, optical_element):
+
+        if self.separable:
+            x, y = self.x, self.y
+            if isinstance(optical_element, LightSource):
+                factors = optical_element.get_separable_E(self.E_x, self.E_y, x, y, self.λ)
+                if factors is not None:
+                    self.E_x, self.E_y = match_precision(factors[0], self.dtype), match_precision(factors[1], self.dtype)
+                    return
+            else:
+                factors = optical_element.get_separable_transmittance(x, y, self.λ)
+                if factors is not None:
+                    self.E_x = self.E_x * match_precision(factors[0], self.dtype)
+                    self.E_y = self.E_y * match_precision(factors[1], self.dtype)
+                    return
+
+            # the element isn't separable: fall back to the 2D field
+            self.E = self.E
+
+        MonochromaticField.add(self, optical_element)
+
+
+    def propagate(self, z, scale_factor = 1, band_limited = False):
+        """
+        Compute the field in distance equal to z with the angular spectrum method (see MonochromaticField.propagate).
+        The angular spectrum kernel isn't separable, so the field is converted to a 2D field.
+        To keep the separable representation, use scale_propagate or zoom_propagate instead.
+        """
+
+        self.E = self.E
+        MonochromaticField.propagate(self, z, scale_factor = scale_factor, band_limited = band_limited)
+
+
+    def scale_propagate(self, z, scale_factor):
+        """
+        Compute the field in distance equal to z with the two step Fresnel propagator (see MonochromaticField.scale_propagate).
+        If the field is separable, each factor is propagated with a 1D transform.
+        """
+
+        if not self.separable:
+            return MonochromaticField.scale_propagate(self, z, scale_factor)
+
+        self.z += z
+        x, self.E_x = two_steps_fresnel_method_1d(self.x, self.dx, self.E_x, z, self.λ, scale_factor)
+        y, self.E_y = two_steps_fresnel_method_1d(self.y, self.dy, self.E_y, z, self.λ, scale_factor)
+        self.E_x = self.E_x * match_precision(bd.exp(1j * 2*np.pi/self.λ * z) / scale_factor, self.E_x)
+        self._update_coordinates(x, y, self.dx*scale_factor, self.dy*scale_factor)
+
+
+    def zoom_propagate(self, z, x_interval, y_interval):
+        """
+        Compute the field in distance equal to z with the Bluestein method (see MonochromaticField.zoom_propagate).
+        If the field is separable, each factor is propagated with a 1D transform.
+        """
+
+        if not self.separable:
+            return MonochromaticField.zoom_propagate(self, z, x_interval, y_interval)
+
+        self.z += z
+        x, self.E_x = bluestein_method_1d(self.x, self.dx, self.E_x, z, self.λ, x_interval)
+        y, self.E_y = bluestein_method_1d(self.y, self.dy, self.E_y, z, self.λ, y_interval)
+        self.E_x = self.E_x * match_precision(bd.exp(1j * 2*np.pi/self.λ * z) / (1j*z*self.λ), self.E_x)
+        self._update_coordinates(x, y, x[1] - x[0], y[1] - y[0])
+
+
+    def get_intensity(self):
+        """compute field intensity of the cross-section profile at the current distance"""
+
+        if self.separable:
+            I_x = bd.real(self.E_x * bd.conjugate(self.E_x))
+            I_y = bd.real(self.E_y * bd.conjugate(self.E_y))
+            return I_y[:, None] * I_x[None, :]
+        return MonochromaticField.get_intensity(self)
@@ -1,4 +1,5 @@
 import numpy
+from contextlib import contextmanager
 
 """
 
@@ -12,6 +13,7 @@ All rights reserved.
 
 global JAX_AVAILABLE
 global CUPY_CUDA_AVAILABLE
+global PYFFTW_AVAILABLE
 
 try:
     import cupy
@@ -21,6 +23,14 @@ except ImportError:
 
 
 
+try:
+    import pyfftw
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
+
+
 try:
     import jax.numpy
     JAX_AVAILABLE = True
@@ -34,15 +44,24 @@ global backend
 backend = numpy
 global backend_name
 backend_name = 'numpy'
+global spectrum_layout
+spectrum_layout = 'native'
 
-def set_backend(name: str):
+def set_backend(name: str, workers = None, wisdom_file = None, planner_effort = 'FFTW_MEASURE'):
     """ Set the backend for the simulations
     This way, all methods of the backend object will be replaced.
     Args:
         name: name of the backend. Allowed backend names:
             - ``CPU``
+            - ``CPU-MT``: numpy arrays with multi-threaded FFTs computed with scipy.fft
+            - ``FFTW``: numpy arrays with FFTs computed with planned pyFFTW transforms
             - ``CUDA``
             - ``JAX``
+        workers: number of threads used by the FFTs of the ``CPU-MT`` and ``FFTW`` backends. 
+                 By default, all the available CPU cores are used.
+        wisdom_file: (``FFTW`` backend only) path of the file used to load and save the FFTW wisdom, 
+                     so that new processes start with the plans of the previously used grid shapes already measured.
+        planner_effort: (``FFTW`` backend only) FFTW planner flag
     """
     # perform checks
     if name == "CUDA" and not CUPY_CUDA_AVAILABLE:
@@ -51,6 +70,11 @@ def set_backend(name: str):
             "Do you have a GPU on your computer?\n"
             "Is Cupy with CUDA support installed?"
         )
+    if name == "FFTW" and not PYFFTW_AVAILABLE:
+        raise RuntimeError(
+            "pyFFTW backend is not available.\n"
+            "Is pyFFTW installed?"
+        )
     global backend
     global backend_name
 
@@ -59,6 +83,16 @@ def set_backend(name: str):
         backend = numpy
         backend_name = 'numpy'
 
+    elif name == "CPU-MT":
+        from .fft_backends import NumpyBackend, ScipyFFT
+        backend = NumpyBackend(ScipyFFT(workers = workers), 'scipy')
+        backend_name = 'numpy'
+
+    elif name == "FFTW":
+        from .fft_backends import NumpyBackend, PyFFTW_FFT
+        backend = NumpyBackend(PyFFTW_FFT(workers = workers, planner_effort = planner_effort, wisdom_file = wisdom_file), 'pyFFTW')
+        backend_name = 'numpy'
+
     elif name == "CUDA":
         backend = cupy
         backend_name = 'cupy'
@@ -70,6 +104,45 @@ def set_backend(name: str):
         raise RuntimeError(f'unknown backend "{name}"')
 
 
+def set_spectrum_layout(layout: str):
+    """ Set the layout of the frequency grids and transfer functions used by the propagation methods
+    Args:
+        layout: name of the layout. Allowed layout names:
+            - ``native``: unshifted FFT order (default). Transfer functions are built directly in the order
+              returned by fft2, avoiding the fftshift/ifftshift copies of the field at each propagation step.
+            - ``centered``: zero frequency at the center of the arrays (fftshift order). Use it to inspect the spectra.
+        The layout is only used internally by the propagation methods: the transfer functions passed to apply_transfer_function
+        and the frequencies passed to get_optical_transfer_function are sampled in centered coordinates unless their layout argument is given.
+    """
+    global spectrum_layout
+
+    if layout not in ('native', 'centered'):
+        raise RuntimeError(f'unknown spectrum layout "{layout}"')
+    spectrum_layout = layout
+
+
+@contextmanager
+def fft_workers(workers):
+    """ Context manager to temporarily set the number of threads used by the FFTs of the multi-threaded backends.
+    With backends that don't support it, it has no effect.
+
+    Example of use:
+    with fft_workers(8):
+        F.propagate(z)
+    """
+    fft = backend.fft
+    if not hasattr(fft, 'workers'):
+        yield
+        return
+
+    previous_workers = fft.workers
+    fft.workers = workers
+    try:
+        yield
+    finally:
+        fft.workers = previous_workers
+
+
 def get_backend():
     global backend    
     print(backend)
@@ -72,8 +72,9 @@ def bluestein_fft2(U, fx0, fx1, fxs,   fy0, fy1, fys):
 
 
     """
-    Ny, Nx = U.shape
-    return bluestein_fft( bluestein_fft(U, f0=fy0, f1=fy1, fs=fys, M=Ny, axis=0), f0=fx0, f1=fx1, fs=fxs, M=Nx, axis=1)
+    # the transform is computed over the last two axes, so stacks of fields (B, Ny, Nx) are transformed at once
+    Ny, Nx = U.shape[-2:]
+    return bluestein_fft( bluestein_fft(U, f0=fy0, f1=fy1, fs=fys, M=Ny, axis=-2), f0=fx0, f1=fx1, fs=fxs, M=Nx, axis=-1)
 
 
 
@@ -133,8 +134,9 @@ def bluestein_ifft2(U, fx0, fx1, fxs,   fy0, fy1, fys):
 
 
     """
-    Ny, Nx = U.shape
-    return bluestein_ifft( bluestein_ifft(U, f0=fy0, f1=fy1, fs=fys, M=Ny, axis=0), f0=fx0, f1=fx1, fs=fxs, M=Nx, axis=1)
+    # the transform is computed over the last two axes, so stacks of fields (B, Ny, Nx) are transformed at once
+    Ny, Nx = U.shape[-2:]
+    return bluestein_ifft( bluestein_ifft(U, f0=fy0, f1=fy1, fs=fys, M=Ny, axis=-2), f0=fx0, f1=fx1, fs=fxs, M=Nx, axis=-1)
 
 
 
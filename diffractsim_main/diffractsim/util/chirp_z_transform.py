@@ -1,5 +1,8 @@
 from .backend_functions import backend as bd
 from .backend_functions import backend_name
+from .precision import complex_dtype
+from .kernel_cache import transfer_function_cache, cache_key
+from .fft_backends import next_fast_len
 
 def chirpz(x, A, W, M):
     """
@@ -40,18 +43,47 @@ def chirpz(x, A, W, M):
         else:
             complex_ = bd.complex64
     else:
-        complex_ = complex
+        # keep the precision of the input (complex64 for single precision simulations)
+        complex_ = complex_dtype(x.dtype) if x.dtype.kind in 'fc' else complex
 
     x = bd.asarray(x, dtype=complex_)
-    P = x.shape
+    N = x.shape[-1]
+    if backend_name != 'jax':
+        # the FFTs along the last axis are much faster with contiguous rows (x is often a swapped view)
+        x = bd.ascontiguousarray(x)
 
-    N = P[-1]
-    L = int(2 ** bd.ceil(bd.log2(M + N - 1)))
+    # the chirps only depend on the transform parameters, so they are stored in the kernel cache.
+    # They are broadcasted along the leading dimensions of x instead of being tiled.
+    key = cache_key('chirpz', backend_name, bd.dtype(complex_).str, N, M, A, W)
+    y_chirp, V, g_chirp = transfer_function_cache.get(key, lambda: get_chirpz_kernels(N, M, A, W, complex_))
+    L = V.shape[-1]
+
+    Y = bd.fft.fft(y_chirp * x, L)
+    g = bd.fft.ifft(V * Y)[..., :M]
+    g = g * g_chirp
+
+    # Return result
+    return g
+
+
+def get_chirpz_kernels(N, M, A, W, complex_):
+    """
+    Compute the vectors used by chirpz to evaluate the transform of a length N signal at M points:
+    the input chirp A^-n W^(n^2/2), the FFT of the convolution chirp W^(-n^2/2) zero padded to length L, 
+    and the output chirp W^(k^2/2)
+    """
+
+    global bd
+    global backend_name
+
+    from .backend_functions import backend as bd
+    from .backend_functions import backend_name
+
+    # the linear convolution of lengths N and M is computed with a circular convolution of a fast FFT length L >= M + N - 1
+    L = next_fast_len(M + N - 1)
 
     n = bd.arange(N, dtype=float)
-    y = bd.power(A, -n) * bd.power(W, n ** 2 / 2.)
-    y = bd.tile(y, (P[0], 1)) * x
-    Y = bd.fft.fft(y, L)
+    y_chirp = (bd.power(A, -n) * bd.power(W, n ** 2 / 2.)).astype(complex_)
 
     n = bd.arange(L, dtype=float)
     v = bd.zeros(L, dtype=complex_)
@@ -64,9 +96,7 @@ def chirpz(x, A, W, M):
 
     V = bd.fft.fft(v)
 
-    g = bd.fft.ifft(bd.tile(V, (P[0], 1)) * Y)[:,:M]
     k = bd.arange(M)
-    g = g * bd.tile(bd.power(W, k ** 2 / 2.), (P[0],1))
+    g_chirp = bd.power(W, k ** 2 / 2.).astype(complex_)
 
-    # Return result
-    return g
+    return y_chirp, V, g_chirp
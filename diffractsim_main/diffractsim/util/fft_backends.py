@@ -0,0 +1,253 @@
+import os
+import numpy
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+"""
+
+
+class NumpyBackend:
+    def __init__(self, fft, name):
+        """
+        numpy namespace whose fft submodule is replaced by the FFT provider fft.
+        All the other attributes are taken from numpy, so the arrays remain numpy arrays.
+        """
+
+        self.fft = fft
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(numpy, attr)
+
+    def __repr__(self):
+        return f"<numpy backend with {self.name} FFTs>"
+
+
+
+class ScipyFFT:
+    def __init__(self, workers = None):
+        """
+        numpy.fft compatible namespace which computes the transforms with scipy.fft using multiple threads.
+        fft2 and ifft2 also accept overwrite_x = True, which computes the transform in the buffer of the complex input array.
+
+        Parameters
+        ----------
+        workers: number of threads used by each transform. By default, all the available CPU cores are used.
+        """
+        import scipy.fft
+
+        self.scipy_fft = scipy.fft
+        self.workers = os.cpu_count() if workers is None else workers
+
+    def fft(self, a, n = None, axis = -1, norm = None):
+        return self.scipy_fft.fft(a, n = n, axis = axis, norm = norm, workers = self.workers)
+
+    def ifft(self, a, n = None, axis = -1, norm = None):
+        return self.scipy_fft.ifft(a, n = n, axis = axis, norm = norm, workers = self.workers)
+
+    def fft2(self, a, s = None, axes = (-2, -1), norm = None, overwrite_x = False):
+        return self.scipy_fft.fft2(a, s = s, axes = axes, norm = norm, overwrite_x = overwrite_x, workers = self.workers)
+
+    def ifft2(self, a, s = None, axes = (-2, -1), norm = None, overwrite_x = False):
+        return self.scipy_fft.ifft2(a, s = s, axes = axes, norm = norm, overwrite_x = overwrite_x, workers = self.workers)
+
+    def fftn(self, a, s = None, axes = None, norm = None):
+        return self.scipy_fft.fftn(a, s = s, axes = axes, norm = norm, workers = self.workers)
+
+    def ifftn(self, a, s = None, axes = None, norm = None):
+        return self.scipy_fft.ifftn(a, s = s, axes = axes, norm = norm, workers = self.workers)
+
+    def rfft(self, a, n = None, axis = -1, norm = None):
+        return self.scipy_fft.rfft(a, n = n, axis = axis, norm = norm, workers = self.workers)
+
+    def irfft(self, a, n = None, axis = -1, norm = None):
+        return self.scipy_fft.irfft(a, n = n, axis = axis, norm = norm, workers = self.workers)
+
+    def rfft2(self, a, s = None, axes = (-2, -1), norm = None):
+        return self.scipy_fft.rfft2(a, s = s, axes = axes, norm = norm, workers = self.workers)
+
+    def irfft2(self, a, s = None, axes = (-2, -1), norm = None):
+        return self.scipy_fft.irfft2(a, s = s, axes = axes, norm = norm, workers = self.workers)
+
+    def __getattr__(self, attr):
+        # fftfreq, fftshift, ifftshift, etc.
+        return getattr(numpy.fft, attr)
+
+
+
+class PyFFTW_FFT:
+    def __init__(self, workers = None, planner_effort = 'FFTW_MEASURE', wisdom_file = None):
+        """
+        numpy.fft compatible namespace which computes the transforms with pyFFTW.
+
+        A FFTW plan with aligned input and output buffers is created once for each (shape, dtype, axes, direction) 
+        and reused in the next calls. If wisdom_file is specified, the FFTW wisdom is loaded from it at startup 
+        and saved each time a new plan is created, so that new processes using the same grid shapes start with 
+        the plans already measured.
+        fft2 and ifft2 also accept overwrite_x = True, which copies the result to the input array (if it's a complex array of the 
+        precision of the plan) instead of allocating a new one.
+
+        Parameters
+        ----------
+        workers: number of threads used by each transform. By default, all the available CPU cores are used.
+        planner_effort: FFTW planner flag: 'FFTW_ESTIMATE', 'FFTW_MEASURE', 'FFTW_PATIENT' or 'FFTW_EXHAUSTIVE'
+        wisdom_file: path of the file where the FFTW wisdom is stored
+        """
+        import pyfftw
+
+        self.pyfftw = pyfftw
+        self.workers = os.cpu_count() if workers is None else workers
+        self.planner_effort = planner_effort
+        self.wisdom_file = wisdom_file
+        self.plans = {}
+
+        if self.wisdom_file is not None:
+            self.load_wisdom()
+
+
+    def load_wisdom(self):
+        import pickle
+
+        if os.path.exists(self.wisdom_file):
+            with open(self.wisdom_file, 'rb') as f:
+                self.pyfftw.import_wisdom(pickle.load(f))
+
+
+    def save_wisdom(self):
+        import pickle
+
+        # write to a temporary file first, so that concurrent processes never read a partially written file
+        tmp_file = f"{self.wisdom_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(self.pyfftw.export_wisdom(), f)
+        os.replace(tmp_file, self.wisdom_file)
+
+
+    def get_plan(self, shape, dtype, axes, direction):
+        """return the FFTW plan of the transform, creating it if it doesn't exist yet"""
+
+        key = (shape, dtype, axes, direction, self.workers)
+        plan = self.plans.get(key)
+
+        if plan is None:
+            input_array = self.pyfftw.empty_aligned(shape, dtype = dtype)
+            output_array = self.pyfftw.empty_aligned(shape, dtype = dtype)
+            plan = self.pyfftw.FFTW(input_array, output_array, axes = axes, direction = direction,
+                                    flags = (self.planner_effort,), threads = self.workers)
+            self.plans[key] = plan
+
+            if self.wisdom_file is not None:
+                self.save_wisdom()
+
+        return plan
+
+
+    def execute(self, a, axes, direction, norm, overwrite_x = False):
+
+        a = numpy.asarray(a)
+        if norm not in (None, 'backward'):
+            return None
+
+        dtype = numpy.complex64 if a.dtype in (numpy.float32, numpy.complex64) else numpy.complex128
+        axes = tuple(axis % a.ndim for axis in axes)
+
+        plan = self.get_plan(a.shape, numpy.dtype(dtype).str, axes, direction)
+        plan.input_array[...] = a
+        plan()
+
+        # the output buffer is reused by the next calls
+        if overwrite_x and a.dtype == dtype and a.flags.writeable:
+            a[...] = plan.output_array
+            return a
+        return plan.output_array.copy()
+
+
+    def fft(self, a, n = None, axis = -1, norm = None):
+        a = _fit_length(numpy.asarray(a), n, axis)
+        A = self.execute(a, (axis,), 'FFTW_FORWARD', norm)
+        return numpy.fft.fft(a, axis = axis, norm = norm) if A is None else A
+
+    def ifft(self, a, n = None, axis = -1, norm = None):
+        a = _fit_length(numpy.asarray(a), n, axis)
+        A = self.execute(a, (axis,), 'FFTW_BACKWARD', norm)
+        return numpy.fft.ifft(a, axis = axis, norm = norm) if A is None else A
+
+    def fft2(self, a, s = None, axes = (-2, -1), norm = None, overwrite_x = False):
+        if s is not None:
+            return numpy.fft.fft2(a, s = s, axes = axes, norm = norm)
+        A = self.execute(a, tuple(axes), 'FFTW_FORWARD', norm, overwrite_x)
+        return numpy.fft.fft2(a, axes = axes, norm = norm) if A is None else A
+
+    def ifft2(self, a, s = None, axes = (-2, -1), norm = None, overwrite_x = False):
+        if s is not None:
+            return numpy.fft.ifft2(a, s = s, axes = axes, norm = norm)
+        A = self.execute(a, tuple(axes), 'FFTW_BACKWARD', norm, overwrite_x)
+        return numpy.fft.ifft2(a, axes = axes, norm = norm) if A is None else A
+
+    def __getattr__(self, attr):
+        # fftfreq, fftshift, ifftshift, and the transforms which aren't planned
+        return getattr(numpy.fft, attr)
+
+
+
+def _fit_length(a, n, axis):
+    """zero-pad or truncate the array a to length n along axis, as numpy.fft.fft does"""
+
+    if n is None or n == a.shape[axis]:
+        return a
+
+    if n < a.shape[axis]:
+        return numpy.take(a, numpy.arange(n), axis = axis)
+
+    pad_width = [(0, 0)] * a.ndim
+    pad_width[axis] = (0, n - a.shape[axis])
+    return numpy.pad(a, pad_width)
+
+
+
+def next_fast_len(n):
+    """
+    Return the smallest length >= n which can be transformed efficiently by the FFT library of the current backend.
+    It's used to choose the zero padding of the convolutions computed with FFTs (for example in the chirp-z transform).
+
+    - numpy, CPU-MT and FFTW backends: 2, 3, 5, 7 and 11 smooth lengths (scipy.fft.next_fast_len).
+    - cupy (cuFFT): 2, 3, 5 and 7 smooth lengths.
+    - jax: 2, 3 and 5 smooth lengths.
+    """
+    from .backend_functions import backend_name
+
+    if backend_name == 'numpy':
+        try:
+            from scipy.fft import next_fast_len as scipy_next_fast_len
+            return scipy_next_fast_len(n)
+        except ImportError:
+            return _next_smooth_len(n, (2, 3, 5, 7, 11))
+    elif backend_name == 'cupy':
+        return _next_smooth_len(n, (2, 3, 5, 7))
+    else:
+        return _next_smooth_len(n, (2, 3, 5))
+
+
+def _next_smooth_len(n, primes):
+    """return the smallest integer >= n whose prime factors are all in primes"""
+
+    best = 1
+    while best < n:
+        best *= 2
+
+    def search(value, i):
+        nonlocal best
+        if value >= n:
+            best = min(best, value)
+            return
+        for j in range(i, len(primes)):
+            if value * primes[j] < best:
+                search(value * primes[j], j)
+
+    search(1, 0)
+    return best
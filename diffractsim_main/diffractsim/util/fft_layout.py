@@ -0,0 +1,82 @@
+from .backend_functions import backend as bd
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Helpers to build frequency grids and spectra in the layout selected with set_spectrum_layout:
+
+- 'native': unshifted FFT order, as returned by fft2. No fftshift/ifftshift copies are required.
+- 'centered': zero frequency at the center of the arrays (fftshift order).
+
+Passing layout = None uses the current global layout.
+"""
+
+
+def get_layout(layout = None):
+    if layout is None:
+        from .backend_functions import spectrum_layout
+        return spectrum_layout
+    return layout
+
+
+def spectrum_fftfreq(N, d, layout = None):
+    """Return the sample frequencies of a N points FFT with sample spacing d in the given layout"""
+    global bd
+    from .backend_functions import backend as bd
+
+    f = bd.fft.fftfreq(N, d = d)
+    if get_layout(layout) == 'centered':
+        f = bd.fft.fftshift(f)
+    return f
+
+
+def spectrum_index(N, layout = None):
+    """
+    Return the integer frequency indices of a N points FFT in the given layout. 
+    In the centered layout it's equal to arange(N) - N//2
+    """
+    global bd
+    from .backend_functions import backend as bd
+
+    if get_layout(layout) == 'centered':
+        return bd.arange(N) - N//2
+    else:
+        return bd.fft.ifftshift(bd.arange(N) - N//2)
+
+
+def forward_spectrum(E, layout = None):
+    """compute the 2D FFT of E over its last two axes in the given layout"""
+    global bd
+    from .backend_functions import backend as bd
+
+    E_f = bd.fft.fft2(E)
+    if get_layout(layout) == 'centered':
+        E_f = bd.fft.fftshift(E_f, axes = (-2,-1))
+    return E_f
+
+
+def inverse_spectrum(E_f, layout = None):
+    """compute the inverse 2D FFT over the last two axes of the spectrum E_f sampled in the given layout"""
+    global bd
+    from .backend_functions import backend as bd
+
+    if get_layout(layout) == 'centered':
+        E_f = bd.fft.ifftshift(E_f, axes = (-2,-1))
+    return bd.fft.ifft2(E_f)
+
+
+def convert_layout(E_f, layout, new_layout = None):
+    """return the spectrum E_f sampled in the given layout reordered in new_layout (by default, the current layout)"""
+    global bd
+    from .backend_functions import backend as bd
+
+    new_layout = get_layout(new_layout)
+    if layout == new_layout:
+        return E_f
+    if new_layout == 'centered':
+        return bd.fft.fftshift(E_f, axes = (-2,-1))
+    return bd.fft.ifftshift(E_f, axes = (-2,-1))
@@ -0,0 +1,82 @@
+import numpy as np
+from .backend_functions import backend as bd
+from .kernel_cache import transfer_function_cache, cache_key
+
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Quasi-discrete Hankel transform (QDHT) of order zero, used to propagate rotationally symmetric fields.
+
+The Hankel transform of order zero of a radial function f(r) is equal to the 2D Fourier transform of f(sqrt(x**2 + y**2)):
+
+g(ν) = 2π ∫ f(r) J0(2π ν r) r dr
+
+The QDHT samples f at the radii r_n = j_n R / S, where j_n is the n-th zero of J0, R is the maximum radius and S = j_(N+1),
+and g at the frequencies ν_n = j_n / (2π R). With this sampling, the transform is computed as a product by an
+orthogonal and symmetric N x N matrix T, which is its own inverse.
+
+Reference:
+M. Guizar-Sicairos and J. C. Gutiérrez-Vega, "Computation of quasi-discrete Hankel transforms of integer order for propagating optical
+wave fields," J. Opt. Soc. Am. A 21, 53-58 (2004)
+"""
+
+
+def get_qdht_kernels(N):
+    """
+    Return the zeros j_n of J0 (n = 1...N), S = j_(N+1), the scaling factors |J1(j_n)| and the transform matrix T.
+    The result is stored in the kernel cache.
+    """
+    global bd
+    global backend_name
+    from .backend_functions import backend as bd
+    from .backend_functions import backend_name
+
+    def build():
+        from scipy import special
+
+        zeros = special.jn_zeros(0, N + 1)
+        j, S = zeros[:N], zeros[N]
+        J1 = np.abs(special.j1(j))
+        T = 2 * special.j0(np.outer(j, j) / S) / (np.outer(J1, J1) * S)
+        return bd.asarray(j), S, bd.asarray(J1), bd.asarray(T)
+
+    key = cache_key('qdht', backend_name, N)
+    return transfer_function_cache.get(key, build)
+
+
+def hankel_sampling(N, R):
+    """return the N radii r_n and frequencies ν_n sampled by the QDHT of a function with maximum radius R"""
+
+    j, S, J1, T = get_qdht_kernels(N)
+    r = j * R / S
+    ν = j / (2 * np.pi * R)
+    return r, ν
+
+
+def qdht(f, R):
+    """
+    Compute the Hankel transform of order zero g(ν_n) of the function f sampled at the radii r_n (see hankel_sampling).
+    The transform is computed along the last axis of f.
+    """
+
+    j, S, J1, T = get_qdht_kernels(f.shape[-1])
+    V = S / (2 * np.pi * R)
+    T = T.astype(f.real.dtype)
+    return (f * (R / J1).astype(f.real.dtype)) @ T * (J1 / V).astype(f.real.dtype)
+
+
+def iqdht(g, R):
+    """
+    Compute the inverse Hankel transform of order zero f(r_n) of the function g sampled at the frequencies ν_n (see hankel_sampling).
+    The transform is computed along the last axis of g.
+    """
+
+    j, S, J1, T = get_qdht_kernels(g.shape[-1])
+    V = S / (2 * np.pi * R)
+    T = T.astype(g.real.dtype)
+    return (g * (V / J1).astype(g.real.dtype)) @ T * (J1 / R).astype(g.real.dtype)
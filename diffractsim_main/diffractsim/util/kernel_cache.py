@@ -0,0 +1,145 @@
+from collections import OrderedDict
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+"""
+
+
+class KernelCache:
+    def __init__(self, max_bytes = 1024**3):
+        """
+        Least recently used (LRU) cache of precomputed kernels (transfer functions, chirps, etc.)
+        bounded by a memory budget.
+
+        Parameters
+        ----------
+        max_bytes: maximum total size in bytes of the arrays stored in the cache.
+                   When the budget is exceeded, the least recently used kernels are evicted.
+                   Set it to 0 to disable caching.
+        """
+
+        self.max_bytes = max_bytes
+        self.kernels = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key, build):
+        """
+        Return the kernel stored with the given key. If it isn't stored, compute it calling build() and store it.
+        Keys which aren't hashable (for example JAX tracers) or equal to None bypass the cache.
+        """
+
+        if key is None:
+            return build()
+
+        try:
+            kernel = self.kernels.get(key)
+        except TypeError:
+            return build()
+
+        if kernel is not None:
+            self.hits += 1
+            self.kernels.move_to_end(key)
+            return kernel
+
+        self.misses += 1
+        kernel = build()
+        self.put(key, kernel)
+        return kernel
+
+
+    def put(self, key, kernel):
+
+        size = _nbytes(kernel)
+        if size > self.max_bytes:
+            return
+
+        if key in self.kernels:
+            self.nbytes -= _nbytes(self.kernels.pop(key))
+
+        self.kernels[key] = kernel
+        self.nbytes += size
+        self.evict()
+
+
+    def evict(self):
+        """remove the least recently used kernels until the memory budget is satisfied"""
+
+        while self.nbytes > self.max_bytes and len(self.kernels) > 0:
+            key, kernel = self.kernels.popitem(last = False)
+            self.nbytes -= _nbytes(kernel)
+
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.evict()
+
+
+    def clear(self):
+        """remove all the stored kernels and reset the hit/miss counters"""
+
+        self.kernels.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def info(self):
+        """return a dictionary with the cache usage statistics"""
+
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.kernels),
+                'nbytes': self.nbytes, 'max_bytes': self.max_bytes}
+
+
+
+def cache_key(*args):
+    """
+    Build a hashable key from the given arguments, converting backend scalars to Python floats.
+    Return None (no caching) if any argument is a traced value that can't be converted.
+    """
+    key = []
+    for arg in args:
+        if isinstance(arg, (str, int, float, complex, tuple, type(None))):
+            key.append(arg)
+        else:
+            try:
+                key.append(complex(arg) if getattr(arg, 'dtype', None) is not None and arg.dtype.kind == 'c' else float(arg))
+            except Exception:
+                return None
+    return tuple(key)
+
+
+def _nbytes(kernel):
+    if isinstance(kernel, tuple):
+        return sum(_nbytes(k) for k in kernel)
+    return getattr(kernel, 'nbytes', 0)
+
+
+
+# cache shared by all the propagation methods (angular spectrum transfer functions, etc.)
+global transfer_function_cache
+transfer_function_cache = KernelCache()
+
+
+def set_kernel_cache_size(max_bytes):
+    """
+    Set the memory budget in bytes of the transfer function cache.
+    Set it to 0 to disable caching.
+    """
+    transfer_function_cache.set_max_bytes(max_bytes)
+
+
+def get_kernel_cache_info():
+    """return a dictionary with the hit/miss counters and the memory usage of the transfer function cache"""
+    return transfer_function_cache.info()
+
+
+def clear_kernel_cache():
+    transfer_function_cache.clear()
@@ -0,0 +1,46 @@
+import numpy as np
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Helpers to implement the floating point precision (dtype) policy of the simulations:
+single precision simulations keep the fields in complex64 and the coordinates in float32,
+double precision simulations (default) keep them in complex128 and float64.
+"""
+
+
+def complex_dtype(dtype):
+    """return the complex dtype with the same precision than dtype (complex64 for float32, complex128 for float64)"""
+    return np.result_type(dtype, np.complex64)
+
+
+def real_dtype(dtype):
+    """return the real dtype with the same precision than dtype (float32 for complex64, float64 for complex128)"""
+    return np.finfo(dtype).dtype
+
+
+def match_precision(a, reference):
+    """
+    Cast the array a to the floating point precision of the reference array (or dtype), 
+    keeping a real or complex. Arrays which already have the same precision are returned without copying.
+    """
+
+    if not hasattr(a, 'dtype') or a.dtype.kind not in 'fc':
+        return a
+
+    reference_dtype = getattr(reference, 'dtype', reference)
+    if np.dtype(reference_dtype).kind not in 'fc':
+        return a
+
+    if a.dtype.kind == 'c':
+        dtype = complex_dtype(reference_dtype)
+    else:
+        dtype = real_dtype(reference_dtype)
+
+    if a.dtype == dtype:
+        return a
+    return a.astype(dtype)
@@ -1,4 +1,6 @@
 from .backend_functions import backend as bd
+from .fft_layout import spectrum_fftfreq, forward_spectrum, inverse_spectrum
+from .precision import match_precision
 
 
 """
@@ -40,14 +42,17 @@ def scaled_fourier_transform(x, y, U, λ = 1,z =1, scale_factor = 1, mesh = Fals
     Ny,Nx = U.shape    
     
     if mesh == False:
-        dx = x[1]-x[0]
-        dy = y[1]-y[0]
         xx, yy = bd.meshgrid(x, y)
     else:
-        dx = x[0,1]-x[0,0]
-        dy = y[1,0]-y[0,0]
         xx, yy = x,y
 
+    # the chirps phases are large, so they are evaluated in double precision and then casted to the precision of U
+    coordinates_dtype = xx.dtype
+    xx = xx.astype(bd.float64)
+    yy = yy.astype(bd.float64)
+    dx = xx[0,1]-xx[0,0]
+    dy = yy[1,0]-yy[0,0]
+
     extent_x = dx*Nx
     extent_y = dy*Ny
 
@@ -55,14 +60,16 @@ def scaled_fourier_transform(x, y, U, λ = 1,z =1, scale_factor = 1, mesh = Fals
     L2 = extent_x*scale_factor
 
     f_factor = 1/(λ*z)
-    fft_U = bd.fft.fftshift(bd.fft.fft2(U * bd.exp(-1j*bd.pi* f_factor*(xx**2 + yy**2) ) * bd.exp(1j*bd.pi*(L1- L2)/L1 * f_factor*(xx**2 + yy**2 ))))
+    r2 = xx**2 + yy**2
+
+    fft_U = forward_spectrum(U * match_precision(bd.exp(-1j*bd.pi* f_factor*r2 ) * bd.exp(1j*bd.pi*(L1- L2)/L1 * f_factor*r2), U))
     
     
-    fx = bd.fft.fftshift(bd.fft.fftfreq(Nx, d = dx))
-    fy = bd.fft.fftshift(bd.fft.fftfreq(Ny, d = dy))
+    fx = spectrum_fftfreq(Nx, dx)
+    fy = spectrum_fftfreq(Ny, dy)
     fxx, fyy = bd.meshgrid(fx, fy)
 
-    Uf = bd.fft.ifft2(bd.fft.ifftshift( bd.exp(- 1j * bd.pi / f_factor * L1/L2 * (fxx**2 + fyy**2))  *  fft_U) )
+    Uf = inverse_spectrum( match_precision(bd.exp(- 1j * bd.pi / f_factor * L1/L2 * (fxx**2 + fyy**2)), U)  *  fft_U)
     
     extent_x = extent_x*scale_factor
     extent_y = extent_y*scale_factor
@@ -73,10 +80,11 @@ def scaled_fourier_transform(x, y, U, λ = 1,z =1, scale_factor = 1, mesh = Fals
     x = x*scale_factor
     y = y*scale_factor
 
-    xx = xx*scale_factor
-    yy = yy*scale_factor  
+    xx = (xx*scale_factor).astype(coordinates_dtype)
+    yy = (yy*scale_factor).astype(coordinates_dtype)
 
-    Uf = L1/L2 * bd.exp(-1j *bd.pi*f_factor* (xx**2 + yy**2)   - 1j * bd.pi*f_factor* (L1-L2)/L2 * (xx**2 + yy**2)) * Uf *1j * (λ*z)
+    r2 = r2 * scale_factor**2
+    Uf = match_precision(L1/L2 * bd.exp(-1j *bd.pi*f_factor* r2   - 1j * bd.pi*f_factor* (L1-L2)/L2 * r2) *1j * (λ*z), U) * Uf
 
     if mesh == False:
         return x, y, Uf
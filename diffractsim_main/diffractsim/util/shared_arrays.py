@@ -0,0 +1,38 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+"""
+
+MPL 2.0 License
+
+Copyright (c) 2022, Rafael de la Fuente
+All rights reserved.
+
+Numpy arrays stored in shared memory blocks, used to pass the fields to a pool of processes without pickling them.
+The process that creates a block is responsible of closing and unlinking it.
+
+"""
+
+
+def share_array(a):
+    """
+    Copy the numpy array a to a new shared memory block.
+    Return the block, the descriptor (name, shape, dtype) used to attach it with attach_array, and the numpy array stored in the block.
+    """
+
+    a = np.asarray(a)
+    block = shared_memory.SharedMemory(create = True, size = max(1, a.nbytes))
+    shared = np.ndarray(a.shape, dtype = a.dtype, buffer = block.buf)
+    shared[...] = a
+    return block, (block.name, a.shape, a.dtype.str), shared
+
+
+def attach_array(descriptor):
+    """
+    Attach to the shared memory block with the given descriptor (see share_array).
+    Return the block and the numpy array stored in it. The block must be kept referenced while the array is used.
+    """
+
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name = name)
+    return block, np.ndarray(shape, dtype = dtype, buffer = block.buf)
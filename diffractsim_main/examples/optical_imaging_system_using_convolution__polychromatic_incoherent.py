@@ -14,6 +14,7 @@ All rights reserved.
 def get_colors_at_image_plane(F, radius, M,  zi, z0):
     from diffractsim.util.backend_functions import backend as bd
     from diffractsim.util.backend_functions import backend_name
+    from diffractsim.util.fft_layout import spectrum_fftfreq, forward_spectrum, inverse_spectrum
 
     import numpy as np
     import time
@@ -56,11 +57,10 @@ def get_colors_at_image_plane(F, radius, M,  zi, z0):
 
     Ip = F.E * bd.conjugate(F.E)
     
-    fft_c = bd.fft.fft2(Ip)
-    c = bd.fft.fftshift(fft_c)
+    c = forward_spectrum(Ip, 'native')
 
-    fx = bd.fft.fftshift(bd.fft.fftfreq(F.Nx, d = F.x[1]-F.x[0]))/M_abs
-    fy = bd.fft.fftshift(bd.fft.fftfreq(F.Ny, d = F.y[1]-F.y[0]))/M_abs
+    fx = spectrum_fftfreq(F.Nx, F.x[1]-F.x[0], 'native')/M_abs
+    fy = spectrum_fftfreq(F.Ny, F.y[1]-F.y[0], 'native')/M_abs
     fx, fy = bd.meshgrid(fx, fy)
     fp = bd.sqrt(fx**2 + fy**2)
 
@@ -78,18 +78,16 @@ def get_colors_at_image_plane(F, radius, M,  zi, z0):
 
         fc = radius / (F.λ_list_samples[i]* nm  * zi) # coherent cutoff frequency
 
-        H = pupil.get_optical_transfer_function(fx, fy, zi, F.λ_list_samples[i]* nm )
+        H = pupil.get_optical_transfer_function(fx, fy, zi, F.λ_list_samples[i]* nm, layout = 'native')
         #H = bd.where(fp < 2 * fc, 2/bd.pi * (bd.arccos(fp / (2*fc)) - fp / (2*fc) * bd.sqrt(1 - (fp / (2*fc))**2)) , bd.zeros_like(fp))
-        Iλ = bd.abs(bd.fft.ifft2(bd.fft.ifftshift(c*H)))
+        Iλ = bd.abs(inverse_spectrum(c*H, 'native'))
 
-        XYZ = F.cs.spec_partition_to_XYZ(bd.outer(Iλ, F.spec_partitions[i]),i)
+        XYZ = F.cs.intensity_to_XYZ(Iλ, F.XYZ_weights[i])
         sRGB_linear += F.cs.XYZ_to_sRGB_linear(XYZ)
 
     if backend_name == 'cupy':
         bd.cuda.Stream.null.synchronize()
 
-    F.xx = M_abs * F.xx
-    F.yy = M_abs * F.yy
     F.x = M_abs * F.x
     F.y = M_abs * F.y
     F.dx = M_abs * F.dx
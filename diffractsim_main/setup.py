@@ -26,6 +26,7 @@ setup(
     license='MPL 2.0',
     packages=find_packages(),
     install_requires=['numpy', 'scipy', 'Pillow', 'matplotlib', 'progressbar', 'jax'],
+    extras_require={'fftw': ['pyFFTW']},
     classifiers=[
         'Development Status :: 5 - Production/Stable',
 